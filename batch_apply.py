@@ -9,9 +9,19 @@ Inputs (CLI):
 - `--resume_path`: path to resume PDF to attach to each draft
 
 Behavior:
-- Optionally scrapes the job description when `use_jd` is set.
-- Uses `src.email_generator.draft_email` to create HTML body.
-- Creates a Gmail draft with `src.gmail_draft.create_draft_with_resume`.
+- Prefetches every job description whose row has `use_jd` set, concurrently
+  and de-duplicated by URL, before any drafting starts.
+- Generates one body per job (shared by all of its contacts, unless a row sets
+  `own_body=yes` or `--body_mode contact` is used), concurrently with
+  `src.email_generator.draft_email_bodies`, then adds each contact's greeting.
+  Rows whose body could not be generated (every fallback model failed) are
+  skipped rather than drafted.
+- Creates the Gmail drafts in bulk with `src.gmail_draft.create_drafts`
+  (Gmail batch requests by default, or one media upload per draft with
+  `--upload media`; a failed draft doesn't affect the others).
+- Records each row's progress (JD, body, draft id) in `src.draft_ledger`, so
+  a re-run after a crash skips rows already drafted and resumes the rest
+  from their last finished stage instead of regenerating them.
 
 Prerequisites:
 - Valid Gmail OAuth credentials (`credentials.json` and `token.json` with `gmail.compose` scope).
@@ -20,18 +30,66 @@ Prerequisites:
 import argparse
 import csv
 import sys
+import time
+from collections import Counter
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from src.email_generator import draft_email
-from src.gmail_draft import create_draft_with_resume
-from src.scraper import fetch_job_description
+from src.draft_ledger import DRAFT_LEDGER_PATH, DraftLedger
+from src.email_generator import (
+    DRAFT_CANDIDATES,
+    draft_email_bodies,
+    preview_messages,
+    render_email_html,
+    report_validation,
+)
+from src.gmail_draft import create_drafts, report_gmail_quota
+from src.llm_cache import configure_llm_cache, report_llm_cache
+from src.llm_metrics import report_llm_metrics
+from src.relevance import estimate_tokens
+from src.scraper import fetch_job_description, fetch_job_descriptions
 
 load_dotenv()
 
 
-def process_row(row, resume_path: str):
+def _wants_jd(row) -> bool:
+    return (row.get("use_jd", "") or "").strip().lower() in ("yes", "y", "true", "1")
+
+
+def prefetch_job_descriptions(rows, max_concurrency: int) -> dict:
+    """Fetch the JD for every `use_jd` row up front and report throughput."""
+    urls = [
+        (row.get("job_url", "") or "").strip()
+        for row in rows
+        if _wants_jd(row) and (row.get("job_url", "") or "").strip()
+    ]
+    if not urls:
+        return {}
+
+    unique_count = len(set(urls))
+    print(
+        f"[JD] Prefetching {unique_count} unique job descriptions "
+        f"({len(urls)} rows, concurrency={max_concurrency})..."
+    )
+    start = time.perf_counter()
+    job_descriptions = fetch_job_descriptions(urls, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+
+    fetched = sum(1 for text in job_descriptions.values() if text)
+    rate = unique_count / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"[JD] Prefetched {fetched}/{unique_count} job descriptions in {elapsed:.1f}s "
+        f"({rate:.1f} URLs/s, {len(urls) - unique_count} duplicate rows skipped)"
+    )
+    return job_descriptions
+
+
+def prepare_row(row, job_descriptions: dict | None = None) -> dict | None:
+    """
+    Validate a CSV row and resolve its job description.
+    Returns the draft_email keyword arguments for the row, or None to skip it.
+    """
     job_id = row.get("job_id", "").strip()
     job_title = row.get("job_title", "").strip()
     job_url = row.get("job_url", "").strip()
@@ -39,7 +97,6 @@ def process_row(row, resume_path: str):
     company_url = row.get("company_url", "").strip()
     contact_name = row.get("contact_name", "").strip()
     contact_email = row.get("contact_email", "").strip()
-    contact_title = row.get("contact_title", "").strip()
     use_jd_flag = (row.get("use_jd", "") or "").strip().lower()
 
     missing = [
@@ -56,47 +113,126 @@ def process_row(row, resume_path: str):
 
     if missing:
         print(f"[SKIP] Row missing required fields {missing}: {row}")
-        return
+        return None
 
     print(f"\n[ROW] job_id={job_id or '?'} '{job_title}' @ {company} → {contact_name} <{contact_email}>")
 
     # Decide whether to scrape JD
     job_description = ""
-    if use_jd_flag in ("yes", "y", "true", "1"):
-        print(f"[JD] Fetching job description from {job_url}")
-        job_description = fetch_job_description(job_url)
+    if _wants_jd(row):
+        if job_descriptions is not None and job_url in job_descriptions:
+            job_description = job_descriptions[job_url]
+        else:
+            print(f"[JD] Fetching job description from {job_url}")
+            job_description = fetch_job_description(job_url)
         if not job_description:
             print("[JD] Warning: empty JD, continuing with background-only context.")
     else:
         print(f"[JD] Skipping JD scrape for {job_url} (use_jd={use_jd_flag})")
 
-    # Generate email HTML using your personalized generator
-    email_html = draft_email(
-        job_title=job_title,
-        job_url=job_url,
-        hiring_manager_name=contact_name,
-        company_name=company,
-        job_description=job_description,
-        company_url=company_url if company_url else None,
-    )
+    return {
+        "job_title": job_title,
+        "job_url": job_url,
+        "hiring_manager_name": contact_name,
+        "company_name": company,
+        "job_description": job_description,
+        "company_url": company_url if company_url else None,
+    }
+
+
+def _wants_own_body(row) -> bool:
+    return (row.get("own_body", "") or "").strip().lower() in ("yes", "y", "true", "1")
+
+
+def plan_bodies(prepared, body_mode: str):
+    """
+    Decide which LLM generations a batch needs.
+
+    In "job" mode, rows that share every field except the contact share one
+    body generated without a name; each contact's greeting is added later.
+    A job with a single contact keeps its named request (sharing would save
+    nothing and lose the personalization). Rows with own_body=yes (and every
+    row in "contact" mode) get their own body.
+    Returns (body_requests, row_to_body) where row_to_body[i] indexes body_requests.
+    """
 
-    print("\n===== GENERATED EMAIL (preview) =====\n")
+    def share_key(row, request):
+        if body_mode != "job" or _wants_own_body(row):
+            return None
+        return tuple((k, v) for k, v in sorted(request.items()) if k != "hiring_manager_name")
+
+    keys = [share_key(row, request) for row, request in prepared]
+    group_sizes = Counter(key for key in keys if key is not None)
+
+    body_requests = []
+    row_to_body = []
+    shared = {}
+    for (row, request), key in zip(prepared, keys):
+        if key is not None and group_sizes[key] > 1:
+            if key not in shared:
+                shared[key] = len(body_requests)
+                body_requests.append({**request, "hiring_manager_name": ""})
+            row_to_body.append(shared[key])
+        else:
+            row_to_body.append(len(body_requests))
+            body_requests.append(request)
+    return body_requests, row_to_body
+
+
+def _draft_message(row, email_html: str, resume_path: str) -> dict:
+    job_title = row.get("job_title", "").strip()
+    company = row.get("company", "").strip()
+
+    print(f"\n===== GENERATED EMAIL (preview): {row.get('contact_email', '').strip()} =====\n")
     print(email_html)
     print("\n=====================================\n")
 
     # Build a subject line
     subject = f"{job_title} – {company}"
+    return dict(
+        to_email=row.get("contact_email", "").strip(),
+        subject=subject,
+        html_body=email_html,
+        resume_path=resume_path,
+    )
 
-    try:
-        create_draft_with_resume(
-            to_email=contact_email,
-            subject=subject,
-            html_body=email_html,
-            resume_path=resume_path,
-        )
-        print(f"[DRAFT] Created Gmail draft to {contact_email} for '{job_title}' at {company}")
-    except Exception as e:
-        print(f"[ERROR] Failed to create draft for {contact_email}: {e}")
+
+def create_row_drafts(
+    rows_and_html: list,
+    resume_path: str,
+    upload: str = "batch",
+    ledger: DraftLedger | None = None,
+) -> int:
+    """
+    Create all drafts (batch API or media uploads) and report each row's outcome.
+    Each draft id is written to the ledger as soon as Gmail returns it.
+    """
+    if not rows_and_html:
+        return 0
+
+    messages = [_draft_message(row, email_html, resume_path) for row, email_html in rows_and_html]
+
+    def record(i: int, result) -> None:
+        row = rows_and_html[i][0]
+        if isinstance(result, Exception):
+            ledger.record_error(row, f"draft: {result}")
+        else:
+            ledger.record_draft(row, result.get("id", ""))
+
+    start = time.perf_counter()
+    results = create_drafts(messages, upload=upload, on_result=record if ledger is not None else None)
+
+    created = 0
+    for (row, _), message, result in zip(rows_and_html, messages, results):
+        job_title = row.get("job_title", "").strip()
+        company = row.get("company", "").strip()
+        if isinstance(result, Exception):
+            print(f"[ERROR] Failed to create draft for {message['to_email']}: {result}")
+        else:
+            created += 1
+            print(f"[DRAFT] Created Gmail draft {result.get('id')} to {message['to_email']} for '{job_title}' at {company}")
+    print(f"[GMAIL] Created {created}/{len(messages)} drafts in {time.perf_counter() - start:.1f}s")
+    return created
 
 
 def main():
@@ -112,7 +248,69 @@ def main():
         default="docs/Sanyuja_Desai_Resume.pdf",
         help="Path to your resume PDF to attach to each draft.",
     )
+    parser.add_argument(
+        "--jd_concurrency",
+        type=int,
+        default=8,
+        help="Number of job descriptions to fetch in parallel during prefetch.",
+    )
+    parser.add_argument(
+        "--llm_concurrency",
+        type=int,
+        default=8,
+        help="Number of emails to generate in parallel.",
+    )
+    parser.add_argument(
+        "--body_mode",
+        choices=["job", "contact"],
+        default="job",
+        help=(
+            "'job': generate one body per job and reuse it for every contact (default). "
+            "'contact': generate a separate body per row. Rows with own_body=yes always get their own."
+        ),
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Fetch JDs and plan the generations, but make no LLM calls and create no drafts.",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=DRAFT_CANDIDATES,
+        help="Completions to generate per email (default 1); the one breaking the fewest prompt rules is kept.",
+    )
+    parser.add_argument(
+        "--upload",
+        choices=["batch", "media"],
+        default="batch",
+        help=(
+            "'batch': send drafts in Gmail batch requests, fewest round trips (default). "
+            "'media': one media upload per draft, ~25%% fewer bytes; better on slow uplinks or large resumes."
+        ),
+    )
+    parser.add_argument(
+        "--ledger_path",
+        default=DRAFT_LEDGER_PATH,
+        help="SQLite ledger of per-row progress; re-runs skip rows already drafted and resume the rest.",
+    )
+    parser.add_argument(
+        "--no_ledger",
+        action="store_true",
+        help="Ignore the ledger: process every row and record nothing.",
+    )
+    parser.add_argument(
+        "--no_llm_cache",
+        action="store_true",
+        help="Disable the on-disk LLM response cache for this run.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached LLM responses (fresh generations still get cached).",
+    )
     args = parser.parse_args()
+    configure_llm_cache(enabled=not args.no_llm_cache, refresh=args.refresh)
 
     csv_path = Path(args.csv_path)
     if not csv_path.exists():
@@ -120,7 +318,7 @@ def main():
         sys.exit(1)
 
     resume_path = Path(args.resume_path)
-    if not resume_path.exists():
+    if not resume_path.exists() and not args.dry_run:
         print(f"[ERROR] Resume PDF not found at: {resume_path}")
         sys.exit(1)
 
@@ -134,9 +332,102 @@ def main():
 
     print(f"[INFO] Processing {len(rows)} rows from {csv_path}...\n")
 
-    for idx, row in enumerate(rows, start=1):
-        print(f"\n=== {idx}/{len(rows)} ===")
-        process_row(row, str(resume_path))
+    ledger = None if args.no_ledger else DraftLedger(args.ledger_path, read_only=args.dry_run)
+    pending = []  # (row, ledger entry or None)
+    for row in rows:
+        entry = ledger.get(row) if ledger is not None else None
+        if entry is not None and entry.reached("draft_created"):
+            print(
+                f"[LEDGER] Skipping {row.get('contact_email', '').strip()} for '{row.get('job_title', '').strip()}': "
+                f"draft {entry.draft_id} already created."
+            )
+            continue
+        pending.append((row, entry))
+    if ledger is not None:
+        print(ledger.summary())
+
+    job_descriptions = prefetch_job_descriptions(
+        [row for row, entry in pending if entry is None],
+        max_concurrency=args.jd_concurrency,
+    )
+
+    prepared = []
+    stored_bodies = []
+    for idx, (row, entry) in enumerate(pending, start=1):
+        print(f"\n=== {idx}/{len(pending)} ===")
+        if entry is not None:
+            # Reuse the JD recorded by the earlier run, so a resumed row keeps the same prompt.
+            request = prepare_row(row, {row.get("job_url", "").strip(): entry.job_description})
+        else:
+            request = prepare_row(row, job_descriptions)
+        if request is None:
+            continue
+        if ledger is not None and entry is None and (request["job_description"] or not _wants_jd(row)):
+            # A wanted JD that came back empty is not recorded: if the row stops
+            # before its body is generated, the next run fetches it again.
+            ledger.record_jd(row, request["job_description"])
+        prepared.append((row, request))
+        stored_bodies.append(entry.body if entry is not None and entry.reached("body_generated") else None)
+
+    if not prepared:
+        print("[INFO] No valid rows to draft.")
+        return
+
+    to_generate = [item for item, body in zip(prepared, stored_bodies) if body is None]
+    body_requests, row_to_body = plan_bodies(to_generate, args.body_mode)
+    if len(to_generate) < len(prepared):
+        print(f"\n[LEDGER] Reusing {len(prepared) - len(to_generate)} bodies generated by an earlier run.")
+    print(
+        f"\n[LLM] Generating {len(body_requests)} bodies for {len(prepared)} rows "
+        f"(mode={args.body_mode}, candidates={args.candidates}, concurrency={args.llm_concurrency})..."
+    )
+    if args.dry_run:
+        for idx, request in enumerate(body_requests, start=1):
+            prompt_tokens = sum(estimate_tokens(m["content"]) for m in preview_messages(**request))
+            who = request["hiring_manager_name"] or "shared"
+            print(
+                f"[DRY RUN] body {idx}: '{request['job_title']}' @ {request['company_name']} "
+                f"({who}), ~{prompt_tokens} prompt tokens"
+            )
+        print("[DRY RUN] No LLM calls made and no drafts created.")
+        return
+
+    bodies = []
+    if body_requests:
+        start = time.perf_counter()
+        bodies = draft_email_bodies(
+            body_requests,
+            max_concurrency=args.llm_concurrency,
+            candidates=args.candidates,
+        )
+        print(f"[LLM] Generated {len(bodies)} bodies in {time.perf_counter() - start:.1f}s")
+
+    skipped = 0
+    rows_and_html = []
+    generated = iter(row_to_body)
+    for (row, request), body in zip(prepared, stored_bodies):
+        if body is None:
+            body = bodies[next(generated)]
+            if body is None:
+                # Never put an error message into a draft; the row can be re-run later.
+                print(f"[SKIP] No email body for {row.get('contact_email', '').strip()} (generation failed).")
+                if ledger is not None:
+                    ledger.record_error(row, "body: generation failed")
+                skipped += 1
+                continue
+            if ledger is not None:
+                ledger.record_body(row, body)
+        rows_and_html.append((row, render_email_html(request["hiring_manager_name"], body)))
+
+    create_row_drafts(rows_and_html, str(resume_path), upload=args.upload, ledger=ledger)
+
+    if skipped:
+        print(f"\n[WARN] Skipped {skipped}/{len(prepared)} rows because generation failed.")
+
+    report_llm_cache()
+    report_validation()
+    report_llm_metrics()
+    report_gmail_quota()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark building drafts.create bodies: the previous per-draft MIME build
+(read resume, base64 it, as_bytes(), base64 the whole message) against the
+cached attachment part spliced into a small envelope.
+
+Usage:
+    python -m benchmarks.bench_draft_mime [--drafts 200] [--resume_kb 250] [--resume PATH]
+
+Reports time per draft and peak traced allocation per draft (tracemalloc).
+"""
+
+import argparse
+import base64
+import mimetypes
+import os
+import tempfile
+import time
+import tracemalloc
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from src.gmail_draft import build_draft_body
+
+HTML = "<p>" + "I led production ML pipelines and would love to help. " * 12 + "</p>"
+
+
+def legacy_build_draft_body(to_email: str, subject: str, html_body: str, resume_path: str) -> dict:
+    """The pre-cache implementation, kept verbatim for comparison."""
+    message = MIMEMultipart()
+    message["to"] = to_email
+    message["subject"] = subject
+    message.attach(MIMEText(html_body, "html"))
+
+    mime_type, _ = mimetypes.guess_type(resume_path)
+    if mime_type is None:
+        mime_type = "application/octet-stream"
+    main_type, sub_type = mime_type.split("/", 1)
+
+    with open(resume_path, "rb") as f:
+        part = MIMEBase(main_type, sub_type)
+        part.set_payload(f.read())
+        encoders.encode_base64(part)
+        part.add_header(
+            "Content-Disposition",
+            f'attachment; filename="{os.path.basename(resume_path)}"',
+        )
+        message.attach(part)
+
+    raw = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    return {"message": {"raw": raw}}
+
+
+def run(build, resume_path: str, drafts: int) -> tuple[float, int]:
+    """(ms per draft, peak KiB allocated while building one draft)."""
+    tracemalloc.start()
+    build("a@example.com", "Warm-up – Acme", HTML, resume_path)
+    tracemalloc.reset_peak()
+    build("a@example.com", "Senior ML Engineer – Acme", HTML, resume_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(drafts):
+        build(f"contact{i}@example.com", "Senior ML Engineer – Acme", HTML, resume_path)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / drafts, peak // 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-draft MIME building.")
+    parser.add_argument("--drafts", type=int, default=200)
+    parser.add_argument("--resume_kb", type=int, default=250, help="Size of the synthetic PDF if --resume is not given.")
+    parser.add_argument("--resume", default=None, help="Use a real resume file instead of a synthetic one.")
+    args = parser.parse_args()
+
+    resume_path = args.resume
+    tmp = None
+    if resume_path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+        tmp.write(b"%PDF-1.4\n" + os.urandom(args.resume_kb * 1024))
+        tmp.close()
+        resume_path = tmp.name
+
+    try:
+        print(f"{'builder':<12} {'ms/draft':>10} {'peak KiB/draft':>15}")
+        for name, build in (("legacy", legacy_build_draft_body), ("cached", build_draft_body)):
+            ms, peak = run(build, resume_path, args.drafts)
+            print(f"{name:<12} {ms:>10.3f} {peak:>15}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Compare drafts.create upload paths against a local fake Gmail endpoint.
+
+Usage:
+    python -m benchmarks.bench_draft_upload [--drafts 20] [--resume_kb 250] [--resumable_kb 0]
+
+A threaded HTTP server on 127.0.0.1 implements the three drafts.create
+variants the client can use:
+- POST /gmail/v1/users/me/drafts                        JSON {"message": {"raw": ...}}
+- POST /upload/gmail/v1/users/me/drafts?uploadType=media     message/rfc822 bytes
+- POST .../drafts?uploadType=resumable, then PUT chunks      resumable upload
+
+Every received message is parsed and its attachment compared with the
+resume, so the run also verifies both paths deliver identical drafts.
+Reported: request bytes per draft and wall time per draft.
+--resumable_kb lowers the resumable threshold to exercise that protocol.
+"""
+
+import argparse
+import base64
+import email
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import src.gmail_draft as gmail_draft
+
+HTML = "<p>" + "I led production ML pipelines and would love to help. " * 12 + "</p>"
+
+
+class FakeGmail:
+    def __init__(self, expected_attachment: bytes):
+        self.expected = expected_attachment
+        self.bytes_received = 0
+        self.requests = 0
+        self.verified = 0
+        self.sessions: dict[str, bytearray] = {}
+        self.lock = threading.Lock()
+
+    def accept(self, rfc822: bytes) -> dict:
+        message = email.message_from_bytes(rfc822)
+        attachment = message.get_payload()[1].get_payload(decode=True)
+        if attachment != self.expected:
+            raise ValueError("attachment mismatch")
+        with self.lock:
+            self.verified += 1
+            return {"id": f"draft{self.verified}", "message": {"id": f"msg{self.verified}"}}
+
+
+def make_handler(fake: FakeGmail):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _read(self) -> bytes:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with fake.lock:
+                fake.requests += 1
+                fake.bytes_received += len(body) + sum(len(k) + len(v) + 4 for k, v in self.headers.items())
+            return body
+
+        def _json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            upload_type = parse_qs(url.query).get("uploadType", [""])[0]
+            body = self._read()
+            try:
+                if url.path == "/gmail/v1/users/me/drafts":
+                    raw = json.loads(body)["message"]["raw"]
+                    self._json(200, fake.accept(base64.urlsafe_b64decode(raw)))
+                elif url.path == "/upload/gmail/v1/users/me/drafts" and upload_type == "media":
+                    self._json(200, fake.accept(body))
+                elif url.path == "/upload/gmail/v1/users/me/drafts" and upload_type == "resumable":
+                    session = f"s{len(fake.sessions) + 1}"
+                    fake.sessions[session] = bytearray()
+                    host = self.headers["Host"]
+                    location = f"http://{host}/upload/session/{session}"
+                    self._json(200, {}, {"Location": location})
+                else:
+                    self._json(404, {"error": {"code": 404, "message": f"unexpected {self.path}"}})
+            except Exception as e:
+                self._json(400, {"error": {"code": 400, "message": str(e)}})
+
+        def do_PUT(self):
+            session = urlparse(self.path).path.rsplit("/", 1)[-1]
+            body = self._read()
+            buffer = fake.sessions[session]
+            buffer.extend(body)
+            # Content-Range: bytes start-end/total
+            total = self.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            if total != "*" and len(buffer) >= int(total):
+                self._json(200, fake.accept(bytes(buffer)))
+            else:
+                self.send_response(308)
+                self.send_header("Range", f"bytes=0-{len(buffer) - 1}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+    return Handler
+
+
+def _loopback_http():
+    """httplib2.Http that keeps loopback requests on plain HTTP.
+
+    The client library swaps only the host of media upload URLs when
+    api_endpoint is overridden, so they would still say https://.
+    """
+    import httplib2
+
+    class LoopbackHttp(httplib2.Http):
+        def request(self, uri, *args, **kwargs):
+            if uri.startswith("https://127.0.0.1:"):
+                uri = "http://" + uri[len("https://") :]
+            return super().request(uri, *args, **kwargs)
+
+    http = LoopbackHttp()
+    http.redirect_codes = http.redirect_codes - {308}  # as src.google_services does
+    return http
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare drafts.create upload paths on a fake endpoint.")
+    parser.add_argument("--drafts", type=int, default=20)
+    parser.add_argument("--resume_kb", type=int, default=250)
+    parser.add_argument("--resumable_kb", type=int, default=0, help="Resumable threshold for this run (0 = default).")
+    args = parser.parse_args()
+
+    from googleapiclient.discovery import build
+
+    data = b"%PDF-1.4\n" + os.urandom(args.resume_kb * 1024)
+    tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    tmp.write(data)
+    tmp.close()
+
+    fake = FakeGmail(data)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    service = build(
+        "gmail",
+        "v1",
+        http=_loopback_http(),
+        static_discovery=True,
+        client_options={"api_endpoint": endpoint},
+    )
+    gmail_draft.get_gmail_service = lambda: service
+    # Measure the upload paths, not quota pacing.
+    gmail_draft._quota = gmail_draft.QuotaScheduler(units_per_second=1e9)
+    if args.resumable_kb:
+        gmail_draft.RESUMABLE_THRESHOLD = args.resumable_kb * 1024
+        gmail_draft.UPLOAD_CHUNK_SIZE = 256 * 1024
+
+    try:
+        print(f"resume {len(data) / 1024:.0f} KiB, {args.drafts} drafts each")
+        print(f"{'path':<8} {'KiB sent/draft':>15} {'ms/draft':>10} {'requests':>9} {'verified':>9}")
+        for upload in ("raw", "media"):
+            fake.bytes_received = fake.requests = fake.verified = 0
+            start = time.perf_counter()
+            for i in range(args.drafts):
+                gmail_draft.create_draft_with_resume(
+                    f"contact{i}@example.com", "Senior ML Engineer – Acme", HTML, tmp.name, upload=upload
+                )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{upload:<8} {fake.bytes_received / 1024 / args.drafts:>15.1f} "
+                f"{elapsed * 1000 / args.drafts:>10.2f} {fake.requests:>9} {fake.verified:>9}"
+            )
+    finally:
+        server.shutdown()
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
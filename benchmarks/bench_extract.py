@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark the one-pass job block extractor against the previous
+find_all() + get_text() implementation over saved HTML fixtures.
+
+Each page is parsed once, outside the timed extraction, and both extractors
+run on that same soup, so the speedup is the algorithm's alone. Parse times
+(html.parser, the previous default, and _make_soup) are reported separately.
+
+Usage:
+    python -m benchmarks.bench_extract [--repeat 5] [--depth 400]
+
+Besides the files in benchmarks/fixtures/, a synthetic deeply nested page
+(Workday-style layout divs) is generated at --depth to show the quadratic
+blow-up of the old approach.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+from src.scraper import HTML_PARSER, _clean_text, _extract_job_block, _make_soup
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def legacy_extract_job_block(soup: BeautifulSoup) -> Optional[str]:
+    """The pre-rewrite extractor, kept verbatim for comparison."""
+    candidates = []
+
+    for tag in soup.find_all(["section", "div", "article"]):
+        attrs = " ".join(
+            [
+                tag.get("id", ""),
+                " ".join(tag.get("class", [])),
+            ]
+        ).lower()
+
+        if any(k in attrs for k in ["job", "description", "posting", "position", "content", "main"]):
+            text = tag.get_text(separator="\n", strip=True)
+            if len(text) > 400:  # ignore tiny blocks
+                candidates.append(text)
+
+    if candidates:
+        return max(candidates, key=len)
+
+    if soup.body:
+        return soup.body.get_text(separator="\n", strip=True)
+
+    return None
+
+
+def synthetic_page(depth: int) -> str:
+    para = "Own forecasting and risk models end to end, from data to deployment. " * 3
+    opens = "".join(f'<div class="wd-content-{i}">' for i in range(depth))
+    body = "".join(f"<p>{para} ({i})</p>" for i in range(40))
+    return f"<html><body>{opens}<div class='job-description'>{body}</div>{'</div>' * depth}</body></html>"
+
+
+def _time(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark job block extraction.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (best time is reported).")
+    parser.add_argument("--depth", type=int, default=400, help="Nesting depth of the synthetic page.")
+    args = parser.parse_args()
+
+    pages = {path.name: path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("*.html"))}
+    pages[f"synthetic_depth_{args.depth}"] = synthetic_page(args.depth)
+
+    print(f"[BENCH] extraction on one shared soup ({HTML_PARSER}), best of {args.repeat}")
+    print(
+        f"{'page':<28} {'html.parser ms':>15} {HTML_PARSER + ' ms':>12} "
+        f"{'legacy ms':>10} {'new ms':>10} {'speedup':>8}  same"
+    )
+    for name, html in pages.items():
+        parse_legacy_s, _ = _time(lambda: BeautifulSoup(html, "html.parser"), args.repeat)
+        parse_s, soup = _time(lambda: _make_soup(html), args.repeat)
+        legacy_s, legacy_text = _time(lambda: legacy_extract_job_block(soup), args.repeat)
+        new_s, new_text = _time(lambda: _extract_job_block(soup), args.repeat)
+        same = _clean_text(legacy_text or "") == _clean_text(new_text or "")
+        print(
+            f"{name:<28} {parse_legacy_s * 1000:>15.1f} {parse_s * 1000:>12.1f} "
+            f"{legacy_s * 1000:>10.1f} {new_s * 1000:>10.1f} {legacy_s / new_s:>7.1f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
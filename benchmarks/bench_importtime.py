@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Measure CLI cold-start import cost with `python -X importtime`.
+
+Usage:
+    python -m benchmarks.bench_importtime [--repeat 5]
+
+For each entrypoint it reports the cumulative import time of the top-level
+module (best of --repeat fresh interpreters). The "eager clients" row is the
+cost of the libraries the CLIs used to import unconditionally at startup
+(openai, googleapiclient, google_auth_oauthlib) and now load on first use.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CASES = {
+    "main": "import main",
+    "batch_apply": "import batch_apply",
+    "src.email_generator": "import src.email_generator",
+    "eager clients (old startup)": (
+        "import openai, googleapiclient.discovery, google_auth_oauthlib.flow, google.oauth2.credentials"
+    ),
+}
+
+
+def cumulative_import_us(code: str) -> int:
+    """Sum of cumulative times of the top-level imports triggered by `code`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces in the name column.
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark CLI import time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per case (best is reported).")
+    args = parser.parse_args()
+
+    print(f"{'case':<30} {'import ms':>10}")
+    for name, code in CASES.items():
+        try:
+            best = min(cumulative_import_us(code) for _ in range(args.repeat))
+        except RuntimeError as e:
+            print(f"{name:<30} {'n/a':>10}  ({e})")
+            continue
+        print(f"{name:<30} {best / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
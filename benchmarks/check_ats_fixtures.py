@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Check the ATS adapters against the recorded API payloads in benchmarks/fixtures/
+and the scraper's board sharing for Ashby, without any network access.
+
+Usage:
+    python -m benchmarks.check_ats_fixtures
+
+- parse_greenhouse / parse_lever / parse_ashby on *_api_*.json fixtures:
+  expected lines present, no markup, scripts dropped
+- route_ats_url on a table of posting URLs (API URL or None)
+- fetch_job_descriptions over several postings of one Ashby org with a fake
+  scheduler: the board is downloaded once, an oversized payload is refused, and
+  a transient failure is retried by the next posting instead of remembered
+
+Prints one line per check and exits 1 if any failed.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+
+from src import scraper
+from src.ats_adapters import parse_ashby, parse_greenhouse, parse_lever, route_ats_url
+from src.jd_cache import JDCache
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+ASHBY_JOB = "0b6e1c9d-3f4a-4e2b-9c1d-7a8b9c0d1e2f"
+ASHBY_OTHER = "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d"
+
+ROUTES = [
+    ("https://boards.greenhouse.io/acme/jobs/4012345", "https://boards-api.greenhouse.io/v1/boards/acme/jobs/4012345"),
+    ("https://job-boards.greenhouse.io/acme/jobs/4012345?gh_src=li", "https://boards-api.greenhouse.io/v1/boards/acme/jobs/4012345"),
+    ("https://boards.greenhouse.io/embed/job_app?for=acme&token=4012345", "https://boards-api.greenhouse.io/v1/boards/acme/jobs/4012345"),
+    ("https://boards.greenhouse.io/acme/jobs/not-a-number", None),
+    ("https://acme.com/careers?gh_jid=4012345", None),
+    ("https://jobs.lever.co/acme/5f1c2a7e-90ab-4c2d-8e11-0a9b8c7d6e5f", "https://api.lever.co/v0/postings/acme/5f1c2a7e-90ab-4c2d-8e11-0a9b8c7d6e5f"),
+    ("https://jobs.eu.lever.co/acme/5f1c2a7e/apply", "https://api.eu.lever.co/v0/postings/acme/5f1c2a7e"),
+    ("https://jobs.lever.co/acme", None),
+    (f"https://jobs.ashbyhq.com/acme/{ASHBY_JOB}", "https://api.ashbyhq.com/posting-api/job-board/acme"),
+    ("https://jobs.ashbyhq.com/acme", None),
+    ("https://notgreenhouse.io/acme/jobs/1", None),
+]
+
+failures = 0
+
+
+def check(name: str, ok: bool, detail: str = "") -> None:
+    global failures
+    failures += not ok
+    print(f"[{'OK' if ok else 'FAIL'}] {name}" + (f": {detail}" if detail and not ok else ""))
+
+
+def load(name: str) -> dict:
+    return json.loads((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+
+
+def check_parsers() -> None:
+    text = parse_greenhouse(load("greenhouse_api_job.json"))
+    lines = text.splitlines()
+    check(
+        "parse_greenhouse",
+        lines[0] == "Senior Machine Learning Engineer"
+        and "Location: New York, NY" in lines
+        and "What you'll do" in lines
+        and "- Own ranking models from training to serving." in lines
+        and "<" not in text
+        and "track()" not in text,
+        text,
+    )
+
+    text = parse_lever(load("lever_api_posting.json"))
+    lines = text.splitlines()
+    check(
+        "parse_lever",
+        lines[0] == "Data Engineer, Platform"
+        and "Location: Remote - US" in lines
+        and "You will design batch and streaming pipelines." in lines
+        and "Responsibilities" in lines
+        and "- Strong Python and SQL" in lines
+        and lines[-1] == "Acme is an equal opportunity employer."
+        and "<" not in text,
+        text,
+    )
+
+    board = load("ashby_api_board.json")
+    text = parse_ashby(board, ASHBY_JOB)
+    lines = text.splitlines()
+    check(
+        "parse_ashby (HTML description)",
+        lines[0] == "Applied Scientist, Recommendations"
+        and "Location: San Francisco" in lines
+        and "- Ship models with PyTorch" in lines
+        and "Product Designer" not in text,
+        text,
+    )
+    check("parse_ashby (plain description)", parse_ashby(board, ASHBY_OTHER).endswith("Design onboarding flows."))
+    check("parse_ashby (posting not on board)", parse_ashby(board, "missing") == "")
+
+
+def check_routes() -> None:
+    for url, expected in ROUTES:
+        route = route_ats_url(url)
+        got = route.api_url if route else None
+        check(f"route_ats_url {url}", got == expected, f"got {got}, expected {expected}")
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes):
+        self.status_code = 200
+        self.ok = True
+        self.headers = {"Content-Type": "application/json"}
+        self._body = body
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i : i + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _FakeScheduler:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.urls: list[str] = []
+        self.fail_next = 0  # raise a connection error for this many requests
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+            if self.fail_next:
+                self.fail_next -= 1
+                raise requests.ConnectionError("connection reset")
+        return _FakeResponse(self.body)
+
+
+def check_board_sharing() -> None:
+    board = load("ashby_api_board.json")
+    # Same org, several postings (as a batch of rows for one company would have).
+    urls = [f"https://jobs.ashbyhq.com/acme/{job_id}" for job_id in (ASHBY_JOB, ASHBY_OTHER, ASHBY_JOB + "?utm_source=x")]
+    fake = _FakeScheduler(json.dumps(board).encode())
+    original_scheduler, original_cache = scraper.get_scheduler, scraper.get_jd_cache
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = JDCache(cache_dir=tmp)
+        scraper.get_scheduler = lambda: fake
+        scraper.get_jd_cache = lambda: cache
+        scraper._boards.clear()
+        try:
+            texts = scraper.fetch_job_descriptions(urls, max_concurrency=3)
+            api_calls = [u for u in fake.urls if "api.ashbyhq.com" in u]
+            check("Ashby board fetched once for 3 postings", len(api_calls) == 1, f"{len(api_calls)} board requests")
+            check(
+                "Ashby postings parsed from the shared board",
+                texts[urls[0]].startswith("Applied Scientist") and texts[urls[1]].startswith("Product Designer"),
+            )
+            raws = [json.loads(cache.get_raw(u) or "{}") for u in urls[:2]]
+            check(
+                "JD cache stores the posting, not the board",
+                [raw.get("id") for raw in raws] == [ASHBY_JOB, ASHBY_OTHER] and not any("jobs" in raw for raw in raws),
+                f"raw payloads {raws}",
+            )
+
+            # A connection error is not remembered: the next posting downloads the board.
+            scraper._boards.clear()
+            fake.urls.clear()
+            fake.fail_next = 1
+            first = scraper.fetch_job_description(f"https://jobs.ashbyhq.com/flaky/{ASHBY_JOB}", use_cache=False)
+            second = scraper.fetch_job_description(f"https://jobs.ashbyhq.com/flaky/{ASHBY_OTHER}", use_cache=False)
+            api_calls = [u for u in fake.urls if "api.ashbyhq.com" in u]
+            check(
+                "Transient board failure retried by the next posting",
+                second.startswith("Product Designer") and len(api_calls) == 2,
+                f"{len(api_calls)} board requests, first={first[:40]!r}, second={second[:40]!r}",
+            )
+
+            # Boards get a larger cap than pages; one over MAX_BOARD_BYTES is refused
+            # (and the HTML fallback gets the same fake body).
+            scraper._boards.clear()
+            padding = b" " * (scraper.MAX_PAGE_BYTES + 1)
+            fake.body = json.dumps(board).encode()[:-1] + padding + b"}"
+            text = scraper.fetch_job_description(f"https://jobs.ashbyhq.com/big/{ASHBY_JOB}", use_cache=False)
+            check("Board over MAX_PAGE_BYTES accepted", text.startswith("Applied Scientist"), repr(text[:80]))
+
+            scraper._boards.clear()
+            fake.body = b'{"jobs": [' + b" " * (scraper.MAX_BOARD_BYTES + 1) + b"]}"
+            fake.urls.clear()
+            text = scraper.fetch_job_description(f"https://jobs.ashbyhq.com/other/{ASHBY_JOB}", use_cache=False)
+            check("Oversized board payload refused", text == "", repr(text[:80]))
+        finally:
+            scraper.get_scheduler, scraper.get_jd_cache = original_scheduler, original_cache
+            scraper._boards.clear()
+
+
+def main() -> None:
+    check_parsers()
+    check_routes()
+    check_board_sharing()
+    print(f"\n{'All checks passed' if not failures else f'{failures} check(s) failed'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Build a list of (job, contact) pairs from raw_jobs.csv.
 - Infers company_domain from company_url or job_url if missing
 - Filters out obviously irrelevant roles using job_profile_rules.is_title_relevant(...)
 - Uses contact_enricher.enrich_contacts(...) to fetch contacts for each company/domain
+  (Hunter results are cached per domain; --purge_hunter_cache clears them first)
 - Writes an output CSV with one row per (job, contact) ready for batch_apply.py
 """
 
@@ -16,7 +17,12 @@ from pathlib import Path
 from urllib.parse import urlparse
 from typing import List, Dict, Any
 
-from src.contact_enricher import enrich_contacts  # your existing Hunter + fallback logic
+from src.ats_adapters import ATS_HOSTS
+from src.contact_enricher import (  # your existing Hunter + fallback logic
+    enrich_contacts,
+    purge_hunter_cache,
+    report_hunter_cache,
+)
 from src.job_profile_rules import is_title_relevant  # your existing relevance rules
 
 
@@ -68,7 +74,7 @@ def infer_company_domain(
 
     # 3) Try job_url, but skip ATS hosts
     host = host_from_url(job_url)
-    if host and not any(ats in host for ats in ["greenhouse.io", "lever.co", "ashbyhq.com"]):
+    if host and not any(ats in host for ats in ATS_HOSTS):
         return host
 
     return ""
@@ -207,12 +213,24 @@ def main() -> None:
         default="jobs/jobs_batch.csv",
         help="Path to the output CSV with one row per (job, contact).",
     )
+    parser.add_argument(
+        "--purge_hunter_cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DOMAIN",
+        help="Forget cached Hunter results before running: for DOMAIN only, or for every domain if none is given.",
+    )
     args = parser.parse_args()
 
     raw_path = Path(args.raw_csv)
     out_path = Path(args.output_csv)
 
+    if args.purge_hunter_cache is not None:
+        purge_hunter_cache(args.purge_hunter_cache or None)
+
     build_job_list(raw_path, out_path)
+    report_hunter_cache()
 
 
 if __name__ == "__main__":
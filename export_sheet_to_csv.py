@@ -8,50 +8,29 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from src.google_services import get_service
 
 load_dotenv()
 
 # We only need read-only access to Sheets
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+TOKEN_PATH = Path("token_sheets.json")
 
 
-def get_credentials():
+def get_sheets_service():
     """
-    Load OAuth credentials from token.json / credentials.json.
-    Reuses the same pattern as Gmail, but with Sheets scopes.
+    Sheets service from the shared Google service manager (token_sheets.json /
+    credentials.json, Sheets read-only scope).
     """
-    creds = None
-    token_path = Path("token_sheets.json")
-    cred_path = Path("credentials.json")
-
-    if token_path.exists():
-        creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
-
-    # If no valid credentials available, let user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not cred_path.exists():
-                print("[ERROR] credentials.json not found. Put your Google OAuth client file in project root.")
-                sys.exit(1)
-            flow = InstalledAppFlow.from_client_secrets_file(str(cred_path), SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        # Save the credentials for next run
-        with token_path.open("w") as token_file:
-            token_file.write(creds.to_json())
-
-    return creds
+    try:
+        return get_service("sheets", "v4", SCOPES, TOKEN_PATH)
+    except FileNotFoundError:
+        print("[ERROR] credentials.json not found. Put your Google OAuth client file in project root.")
+        sys.exit(1)
 
 
 def export_sheet_to_csv(spreadsheet_id: str, sheet_name: str, output_path: str):
-    creds = get_credentials()
-    service = build("sheets", "v4", credentials=creds)
+    service = get_sheets_service()
 
     range_name = f"{sheet_name}"
     print(f"[INFO] Fetching '{range_name}' from spreadsheet {spreadsheet_id} ...")
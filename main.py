@@ -3,9 +3,10 @@
 import argparse
 import sys
 
-from src.email_generator import draft_email
-from src.gmail_draft import create_draft_with_resume
-from src.scraper import fetch_job_description
+from src.email_generator import DRAFT_CANDIDATES, draft_email, preview_messages, report_validation
+from src.llm_cache import configure_llm_cache, report_llm_cache
+from src.llm_metrics import report_llm_metrics
+from src.llm_resilience import LLMUnavailableError
 
 
 def main():
@@ -47,7 +48,29 @@ def main():
         help="Path to your resume PDF to attach to the draft.",
     )
 
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Print the prompt that would be sent and exit; no LLM or Gmail calls.",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=DRAFT_CANDIDATES,
+        help="Completions to generate per email (default 1); the one breaking the fewest prompt rules is kept.",
+    )
+    parser.add_argument(
+        "--no_llm_cache",
+        action="store_true",
+        help="Disable the on-disk LLM response cache for this run.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached LLM responses (fresh generations still get cached).",
+    )
     args = parser.parse_args()
+    configure_llm_cache(enabled=not args.no_llm_cache, refresh=args.refresh)
 
     # Basic guard against placeholder inputs
     for field_name in ["title", "url", "manager", "company"]:
@@ -67,6 +90,8 @@ def main():
             print(f"[WARN] Could not read job description file '{args.jd_file}': {e}")
             job_description = ""
     elif args.jd_url:
+        from src.scraper import fetch_job_description
+
         print(f"[JD] Scraping job description from URL: {args.jd_url}")
         job_description = fetch_job_description(args.jd_url.strip())
         if not job_description:
@@ -74,7 +99,7 @@ def main():
     else:
         print("[JD] No job description source provided (no file or URL). Proceeding without JD context.")
 
-    email_html = draft_email(
+    request = dict(
         job_title=args.title.strip(),
         job_url=args.url.strip(),
         hiring_manager_name=args.manager.strip(),
@@ -83,9 +108,39 @@ def main():
         company_url=args.company_url.strip() if args.company_url else None,
     )
 
+    if args.dry_run:
+        for message in preview_messages(**request):
+            content = message["content"]
+            if isinstance(content, list):
+                # Text parts with a cache breakpoint after the static prefix
+                content = "".join(part["text"] for part in content)
+            print(f"\n===== {message['role'].upper()} =====\n")
+            print(content)
+        print("\n[DRY RUN] No LLM call made and no draft created.")
+        return
+
+    if args.candidates > 1:
+        # Candidate #1 streams; the [RANK] line below says which candidate was kept.
+        print(f"\n===== STREAMING (candidate #1 of {args.candidates}) =====\n")
+    else:
+        print("\n===== STREAMING =====\n")
+    try:
+        email_html = draft_email(
+            **request,
+            on_token=lambda token: print(token, end="", flush=True),
+            candidates=args.candidates,
+        )
+    except (LLMUnavailableError, RuntimeError) as e:
+        print(f"\n[ERROR] Email generation failed: {e}")
+        sys.exit(1)
+    print()
+
     print("\n===== GENERATED EMAIL =====\n")
     print(email_html)
     print("\n===========================\n")
+    report_llm_cache()
+    report_validation()
+    report_llm_metrics()
 
     if args.create_draft:
         if not args.to_email:
@@ -95,6 +150,8 @@ def main():
         # Subject line – tweak if you like
         subject = f"{args.title.strip()} application – {args.company.strip()}"
 
+        from src.gmail_draft import create_draft_with_resume
+
         try:
             create_draft_with_resume(
                 to_email=args.to_email.strip(),
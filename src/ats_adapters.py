@@ -0,0 +1,199 @@
+# src/ats_adapters.py
+
+"""
+Adapters for the public JSON posting APIs of the ATS hosts we see most:
+Greenhouse, Lever and Ashby.
+
+For these hosts the JSON payload is a fraction of the page size and
+already holds the description, so no BeautifulSoup parse is needed.
+
+- route_ats_url(url) returns an AtsRoute (API URL + payload parser) or None
+- parse_* functions are pure: they take the decoded JSON payload and
+  return plain text, so they can be checked against recorded fixtures
+  (benchmarks/check_ats_fixtures.py)
+- Ashby only exposes a whole job board per org; its route is marked as a
+  board route (`select` picks the posting) so the scraper fetches each board
+  once and shares it across that org's postings
+"""
+
+import html
+import json
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+# Host suffixes that belong to an ATS rather than to the hiring company.
+ATS_HOSTS = ("greenhouse.io", "lever.co", "ashbyhq.com")
+
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section"}
+
+
+class _FragmentTextParser(HTMLParser):
+    """Minimal HTML-fragment-to-text converter: one line per block element."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+            if tag == "li":
+                self.parts.append("- ")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_fragment_to_text(fragment: str) -> str:
+    parser = _FragmentTextParser()
+    parser.feed(fragment)
+    parser.close()
+    lines = (re.sub(r"[ \t\xa0]+", " ", line).strip() for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line and line != "-")
+
+
+def parse_greenhouse(payload: dict) -> str:
+    """boards-api.greenhouse.io job payload: `content` is HTML-escaped HTML."""
+    parts = [payload.get("title") or ""]
+    location = (payload.get("location") or {}).get("name")
+    if location:
+        parts.append(f"Location: {location}")
+    parts.append(html_fragment_to_text(html.unescape(payload.get("content") or "")))
+    return "\n\n".join(p for p in parts if p)
+
+
+def parse_lever(payload: dict) -> str:
+    """api.lever.co posting payload: plain description plus HTML `lists` sections."""
+    parts = [payload.get("text") or ""]
+    location = (payload.get("categories") or {}).get("location")
+    if location:
+        parts.append(f"Location: {location}")
+    parts.append(payload.get("descriptionPlain") or html_fragment_to_text(payload.get("description") or ""))
+    for section in payload.get("lists") or []:
+        heading = section.get("text") or ""
+        body = html_fragment_to_text(section.get("content") or "")
+        parts.append(f"{heading}\n{body}".strip())
+    parts.append(payload.get("additionalPlain") or html_fragment_to_text(payload.get("additional") or ""))
+    return "\n\n".join(p.strip() for p in parts if p and p.strip())
+
+
+def find_ashby_job(payload: dict, job_id: str) -> Optional[dict]:
+    """Our posting out of an api.ashbyhq.com job-board payload's `jobs`, or None."""
+    for job in payload.get("jobs") or []:
+        if job.get("id") == job_id or (job.get("jobUrl") or "").rstrip("/").endswith(job_id):
+            return job
+    return None
+
+
+def parse_ashby_job(job: dict) -> str:
+    """One entry of an Ashby job board's `jobs`."""
+    parts = [job.get("title") or ""]
+    if job.get("location"):
+        parts.append(f"Location: {job['location']}")
+    parts.append(job.get("descriptionPlain") or html_fragment_to_text(job.get("descriptionHtml") or ""))
+    return "\n\n".join(p for p in parts if p)
+
+
+def parse_ashby(payload: dict, job_id: str) -> str:
+    """api.ashbyhq.com job-board payload: pick our posting out of the board's `jobs`."""
+    job = find_ashby_job(payload, job_id)
+    return parse_ashby_job(job) if job else ""
+
+
+@dataclass
+class AtsRoute:
+    name: str
+    api_url: str
+    parse: Callable[[dict], str]
+    # Board routes: api_url lists every job of the org and select() picks this
+    # posting (None if it's gone); parse() then takes the posting alone.
+    select: Optional[Callable[[dict], Optional[dict]]] = None
+
+    def to_text(self, body: str) -> str:
+        payload = json.loads(body)
+        if self.select is not None:
+            payload = self.select(payload)
+            if payload is None:
+                return ""
+        return self.parse(payload)
+
+
+def _route_greenhouse(parsed) -> Optional[AtsRoute]:
+    segments = [s for s in parsed.path.split("/") if s]
+    query = parse_qs(parsed.query)
+
+    # boards.greenhouse.io/embed/job_app?for=<board>&token=<id>
+    if segments[:1] == ["embed"] and query.get("for") and query.get("token"):
+        board, job_id = query["for"][0], query["token"][0]
+    # boards.greenhouse.io/<board>/jobs/<id>
+    elif len(segments) >= 3 and segments[1] == "jobs":
+        board, job_id = segments[0], segments[2]
+    # company career pages that link out with ?gh_jid=<id> can't be routed (no board token)
+    else:
+        return None
+
+    if not job_id.isdigit():
+        return None
+    return AtsRoute(
+        name="greenhouse",
+        api_url=f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job_id}",
+        parse=parse_greenhouse,
+    )
+
+
+def _route_lever(parsed) -> Optional[AtsRoute]:
+    segments = [s for s in parsed.path.split("/") if s]
+    if len(segments) < 2:
+        return None
+    company, posting_id = segments[0], segments[1]
+    api_host = "api.eu.lever.co" if parsed.netloc.endswith("eu.lever.co") else "api.lever.co"
+    return AtsRoute(
+        name="lever",
+        api_url=f"https://{api_host}/v0/postings/{company}/{posting_id}",
+        parse=parse_lever,
+    )
+
+
+def _route_ashby(parsed) -> Optional[AtsRoute]:
+    segments = [s for s in parsed.path.split("/") if s]
+    if len(segments) < 2:
+        return None
+    org, job_id = segments[0], segments[1]
+    return AtsRoute(
+        name="ashby",
+        api_url=f"https://api.ashbyhq.com/posting-api/job-board/{org}",
+        parse=parse_ashby_job,
+        select=lambda payload: find_ashby_job(payload, job_id),
+    )
+
+
+# Host suffix -> route builder. Order doesn't matter; suffixes don't overlap.
+_ROUTERS = {
+    "greenhouse.io": _route_greenhouse,
+    "lever.co": _route_lever,
+    "ashbyhq.com": _route_ashby,
+}
+
+
+def route_ats_url(url: str) -> Optional[AtsRoute]:
+    """Return the JSON API route for a known ATS posting URL, or None to scrape HTML."""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    for suffix, router in _ROUTERS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return router(parsed)
+    return None
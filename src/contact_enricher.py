@@ -1,16 +1,29 @@
 # src/contact_enricher.py
 
+import json
 import os
+import sqlite3
+import threading
+import time
 import urllib.parse
-from typing import List, Dict
+from pathlib import Path
+from typing import List, Dict, Optional
 
-import requests
+from .http_scheduler import get_scheduler
 
 
 HUNTER_API_KEY = os.getenv("HUNTER_API_KEY")
 
 HUNTER_DOMAIN_SEARCH_URL = "https://api.hunter.io/v2/domain-search"
 
+# Domain-search results are cached per domain: a company with several open
+# roles costs one Hunter credit, not one per job row.
+HUNTER_CACHE_PATH = os.getenv("HUNTER_CACHE_PATH", ".cache/hunter.sqlite3")
+HUNTER_CACHE_TTL_DAYS = float(os.getenv("HUNTER_CACHE_TTL_DAYS", "14"))
+# "No emails" / 404 answers are kept for less time; Hunter may index the domain later.
+HUNTER_CACHE_NEGATIVE_TTL_HOURS = float(os.getenv("HUNTER_CACHE_NEGATIVE_TTL_HOURS", "24"))
+HUNTER_CACHE_ENABLED = os.getenv("HUNTER_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
 
 # Titles we care about
 ROLE_KEYWORDS = [
@@ -32,9 +45,143 @@ ROLE_KEYWORDS = [
 ]
 
 
+def normalize_domain(domain: str) -> str:
+    """'https://www.Acme.com:443/careers' / 'WWW.acme.com.' -> 'acme.com'."""
+    domain = domain.strip().lower()
+    if "://" in domain:
+        domain = urllib.parse.urlparse(domain).hostname or ""
+    domain = domain.split("/", 1)[0].split(":", 1)[0].rstrip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+class HunterCache:
+    """
+    Hunter domain-search email lists by normalized domain: SQLite on disk,
+    with an in-memory dict in front so repeated domains in one run skip even
+    the database. Empty lists (no emails, 404) use the shorter negative TTL.
+    Errors (auth, quota, 5xx, network) are never cached.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = HUNTER_CACHE_PATH,
+        ttl_days: float = HUNTER_CACHE_TTL_DAYS,
+        negative_ttl_hours: float = HUNTER_CACHE_NEGATIVE_TTL_HOURS,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_days * 86400
+        self.negative_ttl_seconds = negative_ttl_hours * 3600
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory: Dict[str, tuple[float, list]] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                emails TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("DELETE FROM domains WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+
+    def get(self, domain: str) -> Optional[list]:
+        """The cached email list ([] for a cached negative), or None on a miss."""
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(domain)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                self.memory_hits += 1
+                return cached[1]
+
+            row = self._conn.execute(
+                "SELECT emails, expires_at FROM domains WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row and row[1] > now:
+                emails = json.loads(row[0])
+                self._memory[domain] = (row[1], emails)
+                self.hits += 1
+                return emails
+            self.misses += 1
+            return None
+
+    def put(self, domain: str, emails: list, status: int = 200) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if emails else self.negative_ttl_seconds)
+        with self._lock:
+            self._memory[domain] = (expires_at, emails)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO domains (domain, emails, status, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (domain, json.dumps(emails, ensure_ascii=False), status, now, expires_at),
+            )
+            self._conn.commit()
+
+    def purge(self, domain: str | None = None) -> int:
+        """Drop one domain, or every entry when domain is None. Returns rows removed."""
+        with self._lock:
+            if domain is None:
+                self._memory.clear()
+                removed = self._conn.execute("DELETE FROM domains").rowcount
+            else:
+                domain = normalize_domain(domain)
+                self._memory.pop(domain, None)
+                removed = self._conn.execute("DELETE FROM domains WHERE domain = ?", (domain,)).rowcount
+            self._conn.commit()
+        return removed
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return (
+            f"[HUNTER-CACHE] {self.hits} hits ({self.memory_hits} in memory) / {self.misses} misses "
+            f"({rate:.0f}% hit rate, {self.hits} Hunter credits saved)"
+        )
+
+
+_cache: Optional[HunterCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_hunter_cache() -> Optional[HunterCache]:
+    """Return the process-wide cache, or None when HUNTER_CACHE=0."""
+    global _cache
+    if not HUNTER_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HunterCache()
+    return _cache
+
+
+def purge_hunter_cache(domain: str | None = None) -> int:
+    """Forget cached Hunter results for one domain (or all of them)."""
+    cache = get_hunter_cache()
+    removed = cache.purge(domain) if cache is not None else 0
+    print(f"[HUNTER-CACHE] Purged {removed} cached domain{'s' if removed != 1 else ''}.")
+    return removed
+
+
+def report_hunter_cache() -> None:
+    """Print hit/miss counts for this run (no-op when the cache is disabled or unused)."""
+    if _cache is not None and (_cache.hits or _cache.misses):
+        print(_cache.summary())
+
+
 def _extract_domain(company_url: str, company_domain: str | None) -> str | None:
     if company_domain and company_domain.strip():
-        return company_domain.strip()
+        return normalize_domain(company_domain) or None
 
     if not company_url:
         return None
@@ -42,10 +189,7 @@ def _extract_domain(company_url: str, company_domain: str | None) -> str | None:
     try:
         parsed = urllib.parse.urlparse(company_url)
         host = parsed.netloc or parsed.path
-        host = host.lower()
-        if host.startswith("www."):
-            host = host[4:]
-        return host or None
+        return normalize_domain(host) or None
     except Exception:
         return None
 
@@ -81,28 +225,18 @@ def _fallback_contact(company_name: str, domain: str | None) -> List[Dict[str, s
     ]
 
 
-def find_contacts_for_company(
-    company_name: str,
-    company_url: str | None = None,
-    company_domain: str | None = None,
-    max_contacts: int = 5,
-) -> List[Dict[str, str]]:
+def _search_domain(domain: str) -> list | None:
     """
-    Use Hunter's domain search to find relevant people to email at this company.
-    Returns up to `max_contacts` contacts: name, email, position.
-
-    If HUNTER_API_KEY is missing or Hunter returns an error, we
-    fall back to a generic 'Hiring Manager' contact using jobs@domain.
+    Hunter's raw email list for a normalized domain, served from the cache
+    when possible. [] means Hunter has no emails for it (including 404);
+    None means the call failed and nothing was cached.
     """
-    domain = _extract_domain(company_url or "", company_domain)
-
-    if not HUNTER_API_KEY:
-        print("[HUNTER] HUNTER_API_KEY not set; using fallback contact.")
-        return _fallback_contact(company_name, domain)
-
-    if not domain:
-        print(f"[HUNTER] Could not determine domain for {company_name}, skipping.")
-        return []
+    cache = get_hunter_cache()
+    if cache is not None:
+        cached = cache.get(domain)
+        if cached is not None:
+            print(f"[HUNTER] Cached result for domain={domain} ({len(cached)} emails)")
+            return cached
 
     params = {
         "domain": domain,
@@ -111,7 +245,12 @@ def find_contacts_for_company(
     }
 
     try:
-        resp = requests.get(HUNTER_DOMAIN_SEARCH_URL, params=params, timeout=15)
+        resp = get_scheduler().get(HUNTER_DOMAIN_SEARCH_URL, params=params, timeout=15)
+        if resp.status_code == 404:
+            print(f"[HUNTER] Domain not found: {domain}")
+            if cache is not None:
+                cache.put(domain, [], status=404)
+            return []
         # Try to parse JSON error for better debug if status not ok
         if resp.status_code != 200:
             try:
@@ -125,16 +264,47 @@ def find_contacts_for_company(
                     f"[HUNTER] Non-200 response for domain={domain}: "
                     f"status={resp.status_code}, raw_body={resp.text[:300]}"
                 )
-            # Use fallback contact so pipeline still works
-            return _fallback_contact(company_name, domain)
+            return None
 
         data = resp.json()
     except Exception as e:
         print(f"[HUNTER] Error calling Hunter for domain={domain}: {e}")
-        # Use fallback on any error
+        return None
+
+    emails = (data.get("data") or {}).get("emails") or []
+    if cache is not None:
+        cache.put(domain, emails)
+    return emails
+
+
+def find_contacts_for_company(
+    company_name: str,
+    company_url: str | None = None,
+    company_domain: str | None = None,
+    max_contacts: int = 5,
+) -> List[Dict[str, str]]:
+    """
+    Use Hunter's domain search to find relevant people to email at this company.
+    Returns up to `max_contacts` contacts: name, email, position.
+
+    If HUNTER_API_KEY is missing or Hunter returns an error, we
+    fall back to a generic 'Hiring Manager' contact using jobs@domain.
+    Hunter results are cached per domain (see HunterCache).
+    """
+    domain = _extract_domain(company_url or "", company_domain)
+
+    if not HUNTER_API_KEY:
+        print("[HUNTER] HUNTER_API_KEY not set; using fallback contact.")
         return _fallback_contact(company_name, domain)
 
-    emails = data.get("data", {}).get("emails", [])
+    if not domain:
+        print(f"[HUNTER] Could not determine domain for {company_name}, skipping.")
+        return []
+
+    emails = _search_domain(domain)
+    if emails is None:
+        # Use fallback contact so pipeline still works
+        return _fallback_contact(company_name, domain)
     if not emails:
         print(f"[HUNTER] No emails found for domain={domain}, using fallback.")
         return _fallback_contact(company_name, domain)
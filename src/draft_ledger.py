@@ -0,0 +1,160 @@
+# src/draft_ledger.py
+
+"""
+Durable per-row progress for batch_apply (SQLite), so a crashed or
+interrupted batch can be re-run without repeating finished work.
+
+Each row is keyed by (job, contact email): the job is its job_id, or the
+normalized job URL when job_id is blank. A row moves through the stages
+- jd_fetched      the JD was resolved (stored; empty when use_jd is off)
+- body_generated  the validated email body (before the greeting) is stored
+- draft_created   the Gmail draft exists; its id is stored
+
+On a re-run, rows at draft_created are skipped and every other row resumes
+after its last finished stage. If a row's CSV fields change, its stored JD
+and body are ignored (its draft, if created, is still never duplicated).
+
+The ledger is written as each draft result arrives. A crash between Gmail
+accepting a draft and the ledger write can still leave one duplicate.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .jd_cache import normalize_url
+
+
+DRAFT_LEDGER_PATH = os.getenv("DRAFT_LEDGER_PATH", ".state/draft_ledger.sqlite3")
+
+STAGES = ("new", "jd_fetched", "body_generated", "draft_created")
+
+
+def _field(row: dict, name: str) -> str:
+    return (row.get(name, "") or "").strip()
+
+
+def row_key(row: dict) -> tuple[str, str]:
+    """(job key, contact email) identifying a CSV row across runs."""
+    job_id = _field(row, "job_id")
+    job_key = f"id:{job_id}" if job_id else f"url:{normalize_url(_field(row, 'job_url'))}"
+    return job_key, _field(row, "contact_email").lower()
+
+
+def row_fingerprint(row: dict) -> str:
+    """Hash of the row's CSV fields; a change means stored JD/body are stale."""
+    payload = json.dumps({k: _field(row, k) for k in sorted(row) if k}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LedgerEntry:
+    job_key: str
+    contact_email: str
+    stage: str
+    row_hash: str
+    job_description: str = ""
+    body: str = ""
+    draft_id: str = ""
+    error: str = ""
+    updated_at: float = 0.0
+
+    def reached(self, stage: str) -> bool:
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+
+class DraftLedger:
+    def __init__(self, path: str | Path = DRAFT_LEDGER_PATH, read_only: bool = False):
+        """read_only=True (dry runs) reads progress but records nothing."""
+        self.path = Path(path)
+        self.read_only = read_only
+        self.counts = dict.fromkeys(STAGES, 0)  # stage each row was found at this run
+        self.stale = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                job_key TEXT NOT NULL,
+                contact_email TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                job_description TEXT NOT NULL DEFAULT '',
+                body TEXT NOT NULL DEFAULT '',
+                draft_id TEXT NOT NULL DEFAULT '',
+                error TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_key, contact_email)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, row: dict) -> Optional[LedgerEntry]:
+        """
+        The row's progress, or None if it has none worth resuming (never seen,
+        or its CSV fields changed before a draft was created).
+        """
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT job_key, contact_email, stage, row_hash, job_description, body, draft_id, error, updated_at "
+                "FROM rows WHERE job_key = ? AND contact_email = ?",
+                row_key(row),
+            ).fetchone()
+        entry = LedgerEntry(*found) if found else None
+        if entry is not None and entry.stage != "draft_created" and entry.row_hash != row_fingerprint(row):
+            self.stale += 1
+            entry = None
+        self.counts[entry.stage if entry else "new"] += 1
+        return entry
+
+    def _write(self, row: dict, stage: str, **fields) -> None:
+        if self.read_only:
+            return
+        job_key, contact_email = row_key(row)
+        columns = {"stage": stage, "row_hash": row_fingerprint(row), "error": "", **fields}
+        assignments = ", ".join(f"{name} = excluded.{name}" for name in (*columns, "updated_at"))
+        names = ("job_key", "contact_email", *columns, "updated_at")
+        values = (job_key, contact_email, *columns.values(), time.time())
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO rows ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+                f"ON CONFLICT (job_key, contact_email) DO UPDATE SET {assignments}",
+                values,
+            )
+            self._conn.commit()
+
+    def record_jd(self, row: dict, job_description: str) -> None:
+        self._write(row, "jd_fetched", job_description=job_description, body="", draft_id="")
+
+    def record_body(self, row: dict, body: str) -> None:
+        self._write(row, "body_generated", body=body)
+
+    def record_draft(self, row: dict, draft_id: str) -> None:
+        self._write(row, "draft_created", draft_id=draft_id)
+
+    def record_error(self, row: dict, error: str) -> None:
+        """Keep the row at its current stage but note why the last attempt failed."""
+        if self.read_only:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE rows SET error = ?, updated_at = ? WHERE job_key = ? AND contact_email = ?",
+                (error[:500], time.time(), *row_key(row)),
+            )
+            self._conn.commit()
+
+    def summary(self) -> str:
+        found = ", ".join(f"{stage} {n}" for stage, n in self.counts.items())
+        line = f"[LEDGER] Rows found at stage: {found}"
+        if self.stale:
+            line += f" ({self.stale} restarted because their CSV fields changed)"
+        return line + f"  ({self.path})"
@@ -1,28 +1,120 @@
 # src/email_generator.py
 
+import asyncio
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable
 from .profile import BACKGROUND
+from .profile_index import get_headline, select_background
 from .style_profile import load_style_profile
 from .links import LINKEDIN_URL, PORTFOLIO_URL, GITHUB_URL
+from .email_rules import (
+    ValidationStats,
+    compile_avoid_phrases,
+    penalty,
+    rank as rank_bodies,
+    repair_messages,
+    trim_to_words,
+    validate,
+)
+from .llm_cache import get_llm_cache, make_key
+from .llm_client import get_client, make_async_client
+from .llm_metrics import get_llm_metrics
+from .llm_resilience import EmptyCompletionError, LLMUnavailableError, acall_with_fallback, call_with_fallback
+from .relevance import JD_TOKEN_BUDGET, compact_job_description, estimate_tokens
+
+MODEL = "mistralai/mistral-7b-instruct"
+SYSTEM_PROMPT = (
+    "Write as Sanyuja in first-person, following her style profile and background. "
+    "Only output the body of the email, no greeting or signoff."
+)
+# Sampling params sent with every draft; part of the LLM cache key.
+SAMPLING_PARAMS: dict = {}
+# Cache entries hold the final, already validated body. The marker keeps them
+# apart from older entries that stored raw completions.
+CACHE_PARAMS = {**SAMPLING_PARAMS, "body": "validated"}
+# Streaming-only request options (not part of the cache key). include_usage
+# asks for a final usage chunk; it is missed if the stream is stopped early.
+STREAM_PARAMS = {"stream": True, "stream_options": {"include_usage": True}}
+# After the body ends at a signoff, only the name/footer is left, so the stream
+# is read on (and discarded) for up to this many characters to get the usage chunk.
+USAGE_DRAIN_CHARS = int(os.getenv("USAGE_DRAIN_CHARS", "300"))
+# Completions generated per email; the local rule ranker keeps the best one.
+# Each extra candidate re-sends the whole prompt, so n-best is opt-in.
+DRAFT_CANDIDATES = int(os.getenv("DRAFT_CANDIDATES", "1"))
+
+_style_profile: dict | None = None
+_style_profile_lock = threading.Lock()
+
+
+def get_style_profile() -> dict:
+    """Load style_profile.json on first use ({} with a warning if it's missing)."""
+    global _style_profile
+    with _style_profile_lock:
+        if _style_profile is None:
+            try:
+                _style_profile = load_style_profile()
+            except Exception as e:
+                print(f"[WARN] Could not load style profile: {e}")
+                _style_profile = {}
+    return _style_profile
+
+
+SIGNOFF_PHRASES = {
+    "thanks",
+    "thanks,",
+    "thank you",
+    "thank you,",
+    "best",
+    "best,",
+    "sincerely",
+    "sincerely,",
+    "kind regards",
+    "kind regards,",
+    "regards",
+    "regards,",
+}
+
+# The prompt asks for ~150 words; streamed generation is cut off past this.
+BODY_WORD_LIMIT = int(os.getenv("BODY_WORD_LIMIT", "180"))
+
+
+def _is_signoff_line(stripped: str) -> bool:
+    low = stripped.lower()
+    # Any line that appears to just be your name (or includes it), or a common signoff
+    return low in SIGNOFF_PHRASES or "sanyuja" in low
+
+
+def _ends_body(stripped: str) -> bool:
+    """
+    True for a line that closes the email: a signoff phrase, the name on its
+    own, or both ("Best, Sanyuja"). A mention of the name inside a sentence
+    is an ordinary body line.
+    """
+    low = stripped.lower().strip(" *_-\u2013\u2014")
+    if low in SIGNOFF_PHRASES:
+        return True
+    rest = " ".join(w for w in low.replace(",", " ").split() if w.strip(".!") not in ("sanyuja", "desai"))
+    return rest != low.replace(",", " ").strip() and (not rest or rest in SIGNOFF_PHRASES)
 
-load_dotenv()
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise RuntimeError("OPENROUTER_API_KEY is not set in .env")
+def _is_footer_line(stripped: str) -> bool:
+    """Lines the body never keeps: placeholders, signoffs, the name, link footers."""
+    low = stripped.lower()
 
-client = OpenAI(
-    api_key=OPENROUTER_API_KEY,
-    base_url="https://openrouter.ai/api/v1",
-)
+    # Bracketed placeholder/footer lines like:
+    # [Resume attached as a file], [Your LinkedIn Profile: ...], etc.
+    if low.startswith("[") and low.endswith("]"):
+        return True
 
-try:
-    STYLE_PROFILE = load_style_profile()
-except Exception as e:
-    print(f"[WARN] Could not load style profile: {e}")
-    STYLE_PROFILE = {}
+    if _is_signoff_line(stripped):
+        return True
+
+    # Link/footer lines mentioning LinkedIn/GitHub explicitly
+    return "linkedin" in low or "github" in low
 
 
 def _clean_body_text(raw: str) -> str:
@@ -57,21 +149,6 @@ def _clean_body_text(raw: str) -> str:
 
     # 2) Filter out signoffs, names, and footer-y lines anywhere
     filtered = []
-    signoff_phrases = {
-        "thanks",
-        "thanks,",
-        "thank you",
-        "thank you,",
-        "best",
-        "best,",
-        "sincerely",
-        "sincerely,",
-        "kind regards",
-        "kind regards,",
-        "regards",
-        "regards,",
-    }
-
     for line in lines:
         stripped = line.strip()
         if not stripped:
@@ -79,23 +156,7 @@ def _clean_body_text(raw: str) -> str:
             filtered.append(stripped)
             continue
 
-        low = stripped.lower()
-
-        # Bracketed placeholder/footer lines like:
-        # [Resume attached as a file], [Your LinkedIn Profile: ...], etc.
-        if low.startswith("[") and low.endswith("]"):
-            continue
-
-        # Any line that appears to just be your name (or includes it)
-        if "sanyuja" in low:
-            continue
-
-        # Common signoff phrases
-        if low in signoff_phrases:
-            continue
-
-        # Link/footer lines mentioning LinkedIn/GitHub explicitly
-        if "linkedin" in low or "github" in low:
+        if _is_footer_line(stripped):
             continue
 
         filtered.append(stripped)
@@ -139,42 +200,54 @@ def _format_email_html(hiring_manager_name: str, body_text: str) -> str:
     return f"{greeting}{body_html}{closing}"
 
 
-def draft_email(
-    job_title: str,
-    job_url: str,
-    hiring_manager_name: str,
-    company_name: str,
-    job_description: str = "",
-    company_url: str | None = None,
-):
+class BodyStream:
     """
-    Writes a personalized outreach email that:
-    - Uses Sanyuja's real background (BACKGROUND)
-    - Uses her learned style profile (STYLE_PROFILE) if available
-    - Analyzes the job description (if provided) to highlight genuine matches
-    - Mentions that her resume is attached
-    - Uses clean HTML-friendly hyperlinks for the job, company (if given), and her own links
-    - Always formats greeting + signoff as:
+    Accumulates a streamed completion and decides when the body is done:
+    - "signoff": a signoff or name-only line follows some body text
+    - "limit": the body has gone past BODY_WORD_LIMIT words
 
-        Hi {Manager},
-
-        [body]
-
-        Thanks,
-        Sanyuja
+    feed() returns True once generation should stop.
     """
 
-    style_json_str = str(STYLE_PROFILE)
-
-    # HTML hyperlink for the job posting
-    job_link_html = f'<a href="{job_url}">{job_title}</a>'
-
-    # Optional HTML hyperlink for the company name
-    if company_url:
-        company_html = f'<a href="{company_url}">{company_name}</a>'
-    else:
-        company_html = company_name
-
+    def __init__(self, word_limit: int = BODY_WORD_LIMIT):
+        self.word_limit = word_limit
+        self.stop_reason: str | None = None
+        self._lines: list[str] = []  # completed lines
+        self._line = ""  # line still being streamed
+        self._body_words = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self._lines + [self._line])
+
+    def feed(self, delta: str) -> bool:
+        if self.stop_reason:
+            return True
+        self._line += delta
+        while "\n" in self._line:
+            line, self._line = self._line.split("\n", 1)
+            stripped = line.strip()
+            if self._body_words and stripped and _ends_body(stripped):
+                # Only the name and link footers follow a signoff; _clean_body_text drops those.
+                self._line = ""
+                self.stop_reason = "signoff"
+                return True
+            self._lines.append(line)
+            if stripped and not _is_footer_line(stripped):
+                self._body_words += len(stripped.split())
+
+        if self.word_limit > 0 and self._body_words + len(self._line.split()) > self.word_limit:
+            self.stop_reason = "limit"
+            return True
+        return False
+
+
+# Providers where OpenRouter honors explicit cache_control breakpoints. Others
+# (OpenAI, DeepSeek, Mistral via some hosts, ...) cache identical prefixes automatically.
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def _personal_links_block() -> str:
     # HTML links for your personal sites (only if non-empty)
     personal_links_lines = []
     if LINKEDIN_URL:
@@ -184,31 +257,30 @@ def draft_email(
     if GITHUB_URL:
         personal_links_lines.append(f'GitHub: <a href="{GITHUB_URL}">{GITHUB_URL}</a>')
 
-    personal_links_block = "\n".join(personal_links_lines) if personal_links_lines else "None provided."
+    return "\n".join(personal_links_lines) if personal_links_lines else "None provided."
+
 
-    prompt = f"""
+@lru_cache(maxsize=1)
+def static_prompt_prefix() -> str:
+    """
+    Everything in the prompt that is identical for every job: persona, headline,
+    style profile, links, task and rules. Built once per process and always sent
+    first, so providers can reuse their cached computation of this prefix.
+    """
+    return f"""
 You are acting as *Sanyuja Desai*.
 
-==== BACKGROUND (RESUME) ====
-{BACKGROUND}
+==== HEADLINE ====
+{get_headline()}
 
 ==== STYLE PROFILE (JSON, MAY BE EMPTY) ====
-{style_json_str}
-
-==== JOB DESCRIPTION (MAY BE EMPTY) ====
-{job_description}
+{str(get_style_profile())}
 
 ==== PERSONAL LINKS (HTML) ====
-{personal_links_block}
-
-CONTEXT:
-- Role: {job_title}
-- Role Hyperlink: {job_link_html}
-- Company: {company_html}
-- Job Posting URL (raw): {job_url}
+{_personal_links_block()}
 
 TASK:
-Write ONLY the main body of an outreach email to this hiring manager.
+Write ONLY the main body of an outreach email to the recipient described in JOB CONTEXT below.
 
 DO NOT:
 - Do NOT include any greeting at the top (no "Hi Sam," or similar).
@@ -216,12 +288,6 @@ DO NOT:
 - Do NOT include raw footer lines like "[Your LinkedIn Profile: ...]" or standalone LinkedIn/GitHub URLs.
 - Do NOT restate your name; the system will add the signature.
 
-The system will add "Hi {hiring_manager_name}," at the top and "Thanks, Sanyuja" at the bottom.
-
-- Hiring Manager: {hiring_manager_name}
-- Company: {company_name}
-- Role: {job_title}
-
 BODY WRITING RULES:
 - Write in first-person ("I") as Sanyuja.
 - Do NOT include any greeting at the top.
@@ -230,34 +296,508 @@ BODY WRITING RULES:
 - Absolutely avoid em dashes (—). Use commas or short sentences instead.
 - Use correct grammar. Always say “the next steps” instead of “next steps” and similar definite-article cases.
 - Prefer standard professional phrasing. Avoid casual contractions and filler phrases.
-- When referencing the role, you may refer to it as {job_link_html}.
+- When referencing the role, you may use the Role Hyperlink from JOB CONTEXT.
 - Explicitly mention that her resume is attached.
-- Highlight 2–3 real overlaps between her background and the JD.
+- Highlight 2–3 real overlaps between her background (RELEVANT EXPERIENCE) and the JD.
 - Invite a short call or ask for guidance on the next steps.
 - Keep the body under ~150 words.
 - Avoid generic corporate clichés and avoid sounding desperate or apologetic.
 - The output should be plain text that can be sent as an email, but may contain simple HTML like <a href="...">text</a>.
+"""
+
+
+def _user_content(prefix: str, suffix: str):
+    """Plain string, or text parts with a cache breakpoint after the static prefix where supported."""
+    if MODEL.startswith(CACHE_CONTROL_MODEL_PREFIXES):
+        return [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": suffix},
+        ]
+    return prefix + suffix
+
+
+def _build_messages(
+    job_title: str,
+    job_url: str,
+    hiring_manager_name: str,
+    company_name: str,
+    job_description: str = "",
+    company_url: str | None = None,
+) -> list[dict]:
     """
+    Render the chat messages for one outreach email. An empty
+    hiring_manager_name asks for a body that works for any recipient.
+
+    Layout: static_prompt_prefix() followed by a small per-job suffix
+    (relevant experience, JD, job context). The JD is compacted to the
+    sentences that best match BACKGROUND (JD_TOKEN_BUDGET, 0 disables), the
+    experience is narrowed to the best-matching bullets (PROFILE_TOP_K), and
+    the prompt size before/after is printed.
+    """
+    if hiring_manager_name:
+        greeting_note = f'The system will add "Hi {hiring_manager_name}," at the top and "Thanks, Sanyuja" at the bottom.'
+        manager_line = hiring_manager_name
+    else:
+        # Shared body sent to several contacts for the same job (batch_apply job mode).
+        greeting_note = 'The system will add a "Hi <name>," greeting at the top and "Thanks, Sanyuja" at the bottom.'
+        manager_line = "several people at the company; do not address anyone by name"
 
+    full_job_description = job_description
+    job_description = compact_job_description(full_job_description, BACKGROUND, JD_TOKEN_BUDGET)
+    experience = select_background(full_job_description, include_headline=False)
+
+    # HTML hyperlink for the job posting
+    job_link_html = f'<a href="{job_url}">{job_title}</a>'
+
+    # Optional HTML hyperlink for the company name
+    if company_url:
+        company_html = f'<a href="{company_url}">{company_name}</a>'
+    else:
+        company_html = company_name
+
+    prefix = static_prompt_prefix()
+    suffix = f"""
+==== RELEVANT EXPERIENCE (RESUME) ====
+{experience}
+
+==== JOB DESCRIPTION (MAY BE EMPTY) ====
+{job_description}
+
+==== JOB CONTEXT ====
+- Role: {job_title}
+- Role Hyperlink: {job_link_html}
+- Company: {company_html}
+- Job Posting URL (raw): {job_url}
+- Hiring Manager: {manager_line}
+
+{greeting_note}
+    """
+
+    if job_description != full_job_description or experience != BACKGROUND:
+        prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prefix) + estimate_tokens(suffix)
+        saved = (
+            estimate_tokens(full_job_description) - estimate_tokens(job_description)
+            + estimate_tokens(BACKGROUND) - estimate_tokens(experience)
+        )
+        print(
+            f"[PROMPT] JD ~{estimate_tokens(full_job_description)} → ~{estimate_tokens(job_description)} tokens, "
+            f"background ~{estimate_tokens(BACKGROUND)} → ~{estimate_tokens(experience)} tokens; "
+            f"prompt ~{prompt_tokens + saved} → ~{prompt_tokens} tokens "
+            f"(static prefix ~{estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prefix)})"
+        )
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _user_content(prefix, suffix)},
+    ]
+
+
+def _finish_body(content: str) -> str:
+    """Clean the model output down to the email body."""
+    return trim_to_words(_clean_body_text(content), BODY_WORD_LIMIT)
+
+
+def _require_body(content: str) -> str:
+    """Raise (so the fallback chain moves on) if nothing usable survives cleaning."""
+    if not content or not _clean_body_text(content):
+        raise EmptyCompletionError("model returned no usable body")
+    return content
+
+
+def _report_early_stop(body: BodyStream) -> None:
+    if body.stop_reason == "signoff":
+        print("[STREAM] Body complete at the signoff; the rest is discarded.")
+    elif body.stop_reason == "limit":
+        print(f"[STREAM] Body passed {body.word_limit} words; stopped generation early.")
+
+
+def _stream_body(
+    client,
+    messages: list[dict],
+    model: str = MODEL,
+    timeout: float | None = None,
+    on_token: Callable[[str], None] | None = None,
+    label: str = "draft",
+    cache_status: str = "miss",
+    kind: str = "draft",
+) -> str:
+    """
+    Stream one completion, stopping as soon as the body is complete or over the word limit.
+
+    The client's timeout only bounds each read, so a model that keeps
+    streaming slowly is also cut off here once `timeout` seconds have passed
+    (TimeoutError, which sends call_with_fallback on to the next model).
+    After a signoff the stream is drained briefly for its usage chunk (see
+    USAGE_DRAIN_CHARS); past the word limit it is closed at once.
+    """
+    body = BodyStream()
+    deadline = time.monotonic() + timeout if timeout else None
+    drained = None  # characters read after the signoff, while waiting for usage
+    with get_llm_metrics().track(kind, model, label, messages, cache=cache_status) as record:
+        stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            timeout=timeout,
+            **STREAM_PARAMS,
+            **SAMPLING_PARAMS,
+        )
+        try:
+            for chunk in stream:
+                if deadline is not None and time.monotonic() > deadline:
+                    if drained is not None:
+                        break
+                    raise TimeoutError(f"{model} still streaming after {timeout:.0f}s")
+                if chunk.usage is not None:
+                    record.set_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if drained is not None:
+                    drained += len(delta)
+                    if drained > USAGE_DRAIN_CHARS:
+                        break
+                    continue
+                if delta:
+                    record.first_token()
+                if on_token and delta:
+                    on_token(delta)
+                if delta and body.feed(delta):
+                    if body.stop_reason != "signoff":
+                        break
+                    drained = 0
+        finally:
+            # Closing the response aborts the generation instead of paying for the ramble.
+            stream.close()
+            record.output = body.text
+        _report_early_stop(body)
+        return _require_body(body.text)
+
+
+async def _stream_body_async(
+    async_client,
+    messages: list[dict],
+    model: str = MODEL,
+    timeout: float | None = None,
+    label: str = "draft",
+    cache_status: str = "miss",
+    kind: str = "draft",
+) -> str:
+    body = BodyStream()
+    # Stop draining a little before asyncio.wait_for would cancel the finished body.
+    drain_until = time.monotonic() + timeout - 1.0 if timeout else None
+    drained = None
+    with get_llm_metrics().track(kind, model, label, messages, cache=cache_status) as record:
+        stream = await async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            timeout=timeout,
+            **STREAM_PARAMS,
+            **SAMPLING_PARAMS,
+        )
+        try:
+            async for chunk in stream:
+                if drained is not None and drain_until is not None and time.monotonic() > drain_until:
+                    break
+                if chunk.usage is not None:
+                    record.set_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if drained is not None:
+                    drained += len(delta)
+                    if drained > USAGE_DRAIN_CHARS:
+                        break
+                    continue
+                if delta:
+                    record.first_token()
+                if delta and body.feed(delta):
+                    if body.stop_reason != "signoff":
+                        break
+                    drained = 0
+        finally:
+            await stream.close()
+            record.output = body.text
+        return _require_body(body.text)
+
+
+@lru_cache(maxsize=1)
+def _avoid_phrases():
+    return compile_avoid_phrases(get_style_profile().get("phrases_to_avoid", []))
+
+
+def _pick_candidate(results: list, label: str) -> tuple[str, str]:
+    """
+    Best (content, model) among the successful candidates, ranked by the local
+    rule checker (src.email_rules). Raises the first error if none succeeded.
+    """
+    ok = [r for r in results if not isinstance(r, Exception)]
+    if not ok:
+        raise results[0]
+    if len(ok) == 1:
+        return ok[0]
+
+    ranked = rank_bodies([_finish_body(content) for content, _ in ok], _avoid_phrases())
+    best, score, names = ranked[0]
+    others = ", ".join(f"#{i + 1}={p:g}" for i, p, _ in ranked[1:])
+    problems = f" ({', '.join(names)})" if names else ""
+    print(f"[RANK] {label}: picked candidate #{best + 1} of {len(ok)}, penalty {score:g}{problems}; others {others}")
+    return ok[best]
+
+
+VALIDATION_STATS = ValidationStats()
+
+
+def _settle(checked, repaired_content: str | None, label: str) -> str:
+    """Pick between the locally fixed body and a model repair; record the outcome."""
+    if repaired_content is not None:
+        repaired = validate(_finish_body(repaired_content), _avoid_phrases())
+        if repaired.ok:
+            VALIDATION_STATS.record("repaired")
+            return repaired.body
+        if penalty(repaired.remaining) < penalty(checked.remaining):
+            checked = repaired
+    VALIDATION_STATS.record("failed", checked.remaining)
+    print(f"[WARN] {label}: body still breaks {', '.join(checked.remaining)}")
+    return checked.body
+
+
+def _validate_and_repair(body: str, label: str, cache_status: str) -> str:
+    """
+    Run the rule validator; cheap violations are fixed locally, and only a
+    body that still fails goes back to the model with a short repair prompt.
+    """
+    checked = validate(body, _avoid_phrases())
+    if checked.ok:
+        VALIDATION_STATS.record("fixed" if checked.fixed else "pass")
+        return checked.body
+
+    print(f"[VALIDATE] {label}: asking for a repair ({', '.join(checked.remaining)})")
+    messages = repair_messages(checked.body, checked.remaining, _avoid_phrases())
+    client = get_client()
     try:
-        completion = client.chat.completions.create(
-            model="mistralai/mistral-7b-instruct",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Write as Sanyuja in first-person, following her style profile and background. Only output the body of the email, no greeting or signoff.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        repaired, _ = call_with_fallback(
+            lambda model, timeout: _stream_body(
+                client, messages, model, timeout, label=label, cache_status=cache_status, kind="repair"
+            ),
+            MODEL,
+            label=f"repair {label}",
         )
-    except Exception as e:
-        print(f"[ERROR] OpenRouter chat.completions.create failed: {e}")
-        return "[ERROR] Failed to generate email. Check OPENROUTER_API_KEY, network, or model name."
+    except LLMUnavailableError as e:
+        print(f"[WARN] {e}")
+        repaired = None
+    return _settle(checked, repaired, label)
+
+
+async def _validate_and_repair_async(
+    body: str,
+    async_client,
+    semaphore: asyncio.Semaphore,
+    label: str,
+    cache_status: str,
+) -> str:
+    checked = validate(body, _avoid_phrases())
+    if checked.ok:
+        VALIDATION_STATS.record("fixed" if checked.fixed else "pass")
+        return checked.body
+
+    print(f"[VALIDATE] {label}: asking for a repair ({', '.join(checked.remaining)})")
+    messages = repair_messages(checked.body, checked.remaining, _avoid_phrases())
+    async with semaphore:
+        try:
+            repaired, _ = await acall_with_fallback(
+                lambda model, timeout: _stream_body_async(
+                    async_client, messages, model, timeout, label=label, cache_status=cache_status, kind="repair"
+                ),
+                MODEL,
+                label=f"repair {label}",
+            )
+        except LLMUnavailableError as e:
+            print(f"[WARN] {e}")
+            repaired = None
+    return _settle(checked, repaired, label)
+
+
+def report_validation() -> None:
+    """Print pass / fixed / repaired / failed rates for this run (no-op if nothing was validated)."""
+    if sum(VALIDATION_STATS.counts.values()):
+        print(VALIDATION_STATS.summary())
+
+
+def render_email_html(hiring_manager_name: str, body_text: str) -> str:
+    """Wrap a generated body for one recipient."""
+    return _format_email_html(hiring_manager_name, body_text)
+
+
+def draft_email(
+    job_title: str,
+    job_url: str,
+    hiring_manager_name: str,
+    company_name: str,
+    job_description: str = "",
+    company_url: str | None = None,
+    on_token: Callable[[str], None] | None = None,
+    candidates: int = DRAFT_CANDIDATES,
+) -> str:
+    """
+    Writes a personalized outreach email that:
+    - Uses the parts of Sanyuja's real background (BACKGROUND) that match the JD
+    - Uses her learned style profile (STYLE_PROFILE) if available
+    - Analyzes the job description (if provided) to highlight genuine matches
+    - Mentions that her resume is attached
+    - Uses clean HTML-friendly hyperlinks for the job, company (if given), and her own links
+    - Always formats greeting + signoff as:
+
+        Hi {Manager},
 
-    content = completion.choices[0].message.content
-    if not content or not content.strip():
-        print("[WARN] Model returned empty content.")
-        return "[WARN] Model returned empty content. Try a different model or check request."
+        [body]
 
-    cleaned_body = _clean_body_text(content)
-    return _format_email_html(hiring_manager_name, cleaned_body)
+        Thanks,
+        Sanyuja
+
+    The completion is streamed (on_token gets each text delta of the first
+    candidate as it arrives) and stopped once the body is complete or over
+    BODY_WORD_LIMIT words. `candidates` completions are generated in parallel
+    and the one breaking the fewest prompt rules is kept; it is then
+    validated, with cheap fixes applied locally and a short repair prompt
+    sent only if rules are still broken. Transient failures are retried and then handed to the fallback models
+    (src.llm_resilience); LLMUnavailableError is raised if all of them fail.
+    """
+
+    messages = _build_messages(
+        job_title=job_title,
+        job_url=job_url,
+        hiring_manager_name=hiring_manager_name,
+        company_name=company_name,
+        job_description=job_description,
+        company_url=company_url,
+    )
+
+    label = f"draft '{job_title}'"
+    cache = get_llm_cache()
+    cache_status = "miss" if cache else "off"
+    cached = cache.get(make_key(MODEL, messages, CACHE_PARAMS)) if cache else None
+    if cached is not None:
+        # Validated (and repaired if needed) before it was stored: no re-check, no stats.
+        get_llm_metrics().cache_hit("draft", MODEL, label)
+        return render_email_html(hiring_manager_name, cached)
+
+    client = get_client()  # a missing API key fails here, not inside the retry loop
+
+    def candidate(i: int):
+        try:
+            return call_with_fallback(
+                lambda model, timeout: _stream_body(
+                    client,
+                    messages,
+                    model,
+                    timeout,
+                    on_token=on_token if i == 0 else None,
+                    label=label,
+                    cache_status=cache_status,
+                ),
+                MODEL,
+                label=label,
+            )
+        except LLMUnavailableError as e:
+            return e
+
+    candidates = max(1, candidates)
+    if candidates == 1:
+        results = [candidate(0)]
+    else:
+        with ThreadPoolExecutor(max_workers=candidates) as pool:
+            results = list(pool.map(candidate, range(candidates)))
+    content, model = _pick_candidate(results, label)
+
+    body = _validate_and_repair(_finish_body(content), label, cache_status)
+    if cache:
+        # Cache the validated body so a rerun needs neither generation nor repair.
+        # Keyed on MODEL (what lookups use) even when a fallback model wrote it;
+        # the model column records which one did.
+        cache.put(make_key(MODEL, messages, CACHE_PARAMS), model, body)
+    return render_email_html(hiring_manager_name, body)
+
+
+async def _draft_bodies_async(requests: list[dict], max_concurrency: int, candidates: int) -> list[str | None]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+    cache = get_llm_cache()
+
+    async with make_async_client(max_concurrency) as async_client:
+
+        async def one(request: dict) -> str | None:
+            messages = _build_messages(**request)
+            label = f"draft '{request.get('job_title')}'"
+            cache_status = "miss" if cache else "off"
+            cached = cache.get(make_key(MODEL, messages, CACHE_PARAMS)) if cache else None
+            if cached is not None:
+                # Already validated when stored (see draft_email).
+                get_llm_metrics().cache_hit("draft", MODEL, label)
+                return cached
+
+            async def candidate():
+                async with semaphore:
+                    try:
+                        return await acall_with_fallback(
+                            lambda model, timeout: _stream_body_async(
+                                async_client, messages, model, timeout, label=label, cache_status=cache_status
+                            ),
+                            MODEL,
+                            label=label,
+                        )
+                    except LLMUnavailableError as e:
+                        return e
+
+            results = await asyncio.gather(*(candidate() for _ in range(candidates)))
+            try:
+                content, model = _pick_candidate(results, label)
+            except LLMUnavailableError as e:
+                print(f"[ERROR] {e}")
+                return None
+
+            body = await _validate_and_repair_async(_finish_body(content), async_client, semaphore, label, cache_status)
+            if cache:
+                cache.put(make_key(MODEL, messages, CACHE_PARAMS), model, body)
+            return body
+
+        return await asyncio.gather(*(one(request) for request in requests))
+
+
+def preview_messages(**request) -> list[dict]:
+    """Dry run: the exact messages draft_email would send, without any client or API call."""
+    return _build_messages(**request)
+
+
+def draft_email_bodies(
+    requests: list[dict],
+    max_concurrency: int = 8,
+    candidates: int = DRAFT_CANDIDATES,
+) -> list[str | None]:
+    """
+    Batched body generation: each request is a dict of draft_email keyword arguments
+    (hiring_manager_name may be "" for a body shared by several contacts).
+
+    Runs up to max_concurrency OpenRouter calls at once over one pooled
+    AsyncOpenAI client; each request fans out to `candidates` completions and
+    keeps the best-ranked one, which is validated and repaired like in
+    draft_email. Results are cleaned bodies (no greeting/signoff) in
+    request order; a request whose whole model chain fails yields None
+    without affecting the rest. Cached bodies (stored after validation) are
+    served as-is, without an API call or another validation pass. Use
+    render_email_html to add each recipient's greeting.
+    """
+    if not requests:
+        return []
+    return asyncio.run(_draft_bodies_async(requests, max(1, max_concurrency), max(1, candidates)))
+
+
+def draft_emails(
+    requests: list[dict],
+    max_concurrency: int = 8,
+    candidates: int = DRAFT_CANDIDATES,
+) -> list[str | None]:
+    """Batched draft_email: full HTML emails in request order (None where generation failed)."""
+    bodies = draft_email_bodies(requests, max_concurrency=max_concurrency, candidates=candidates)
+    return [
+        render_email_html(request["hiring_manager_name"], body) if body is not None else None
+        for request, body in zip(requests, bodies)
+    ]
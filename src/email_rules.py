@@ -0,0 +1,284 @@
+# src/email_rules.py
+
+"""
+Local checks for the BODY WRITING RULES in the draft prompt.
+
+- rank: order generated candidates without another model call; each violated
+  rule costs its weight, lowest penalty wins (ties go to the body closest to
+  the target length)
+- validate: apply the cheap deterministic fixes (em dash -> comma, "the next
+  steps", stray greeting/signoff lines, trimming a long body at a sentence)
+  and report what is still broken
+- repair_messages: a short prompt asking a model to fix only those problems
+
+All patterns are compiled once at import; checking a body is a handful of
+regex searches.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+TARGET_WORDS = 150
+
+_EM_DASH_RE = re.compile("[—―]| -- ")
+_SPACED_EM_DASH_RE = re.compile(r"\s*(?:[—―]|--)\s*")
+_SENTENCE_END_RE = re.compile(r"[.!?](?:[\"')\]]|</a>)?(?=\s|$)")
+_RESUME_ATTACHED_RE = re.compile(
+    r"\b(resume|résumé|cv)\b[^.!?]{0,60}\battach|\battach\w*\b[^.!?]{0,60}\b(resume|résumé|cv)\b",
+    re.IGNORECASE,
+)
+_BARE_NEXT_STEPS_RE = re.compile(r"(?<!\bthe )\bnext steps\b", re.IGNORECASE)
+_INVITE_RE = re.compile(
+    r"\b(call|chat|conversation|connect|speak|talk|meet|guidance|next steps)\b",
+    re.IGNORECASE,
+)
+_GREETING_RE = re.compile(r"^\s*(hi|hello|dear|hey)\b[^\n]{0,40}[,:!]\s*$", re.IGNORECASE | re.MULTILINE)
+_SIGNOFF_RE = re.compile(
+    r"^\s*(thanks|thank you|best|best regards|sincerely|kind regards|regards|cheers)[,!.]?\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_PLACEHOLDER_RE = re.compile(r"\[[^\]]{2,60}\]|\{[^}]{2,40}\}|<(your|company|name)[^>]*>", re.IGNORECASE)
+_CLICHES_RE = re.compile(
+    r"\b(synergy|synergies|team player|hit the ground running|think outside the box|"
+    r"go-getter|rockstar|ninja|dynamic self-starter|perfect fit|dream job)\b",
+    re.IGNORECASE,
+)
+_DESPERATE_RE = re.compile(
+    r"\b(sorry to bother|apologi[sz]e for|i know you are busy|any opportunity at all|desperate)\b",
+    re.IGNORECASE,
+)
+
+
+def word_count(body: str) -> int:
+    return len(body.split())
+
+
+def trim_to_words(body: str, limit: int) -> str:
+    """Cut a body that runs past `limit` words back to its last complete sentence."""
+    words = body.split()
+    if limit <= 0 or len(words) <= limit:
+        return body
+
+    # Keep the paragraph breaks: find where the limit-th word ends in the original text.
+    end = 0
+    for word in words[:limit]:
+        end = body.index(word, end) + len(word)
+    head = body[:end]
+    sentence_ends = list(_SENTENCE_END_RE.finditer(head))
+    if sentence_ends:
+        head = head[: sentence_ends[-1].end()]
+    return head.rstrip()
+
+
+def _replace_em_dashes(body: str) -> str:
+    return _SPACED_EM_DASH_RE.sub(", ", body)
+
+
+def _add_definite_article(body: str) -> str:
+    def repl(match: re.Match) -> str:
+        article = "The " if match.group(0)[0].isupper() else "the "
+        return article + match.group(0).lower()
+
+    return _BARE_NEXT_STEPS_RE.sub(repl, body)
+
+
+def _drop_lines(pattern: re.Pattern) -> Callable[[str], str]:
+    return lambda body: re.sub(r"\n{3,}", "\n\n", pattern.sub("", body)).strip()
+
+
+def _trim_long(body: str) -> str:
+    trimmed = trim_to_words(body, TARGET_WORDS)
+    # Only a cheap fix if little is lost; otherwise ask the model to tighten it.
+    return trimmed if word_count(trimmed) >= TARGET_WORDS * 2 // 3 else body
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    weight: float
+    violated: Callable[[str], bool]
+    hint: str  # instruction used in the repair prompt
+    fix: Optional[Callable[[str], str]] = None  # deterministic fix, if there is one
+
+
+RULES: tuple[Rule, ...] = (
+    Rule(
+        "em_dash",
+        3.0,
+        lambda b: bool(_EM_DASH_RE.search(b)),
+        "Remove every em dash; use commas or short sentences instead.",
+        _replace_em_dashes,
+    ),
+    Rule(
+        "too_long",
+        3.0,
+        lambda b: word_count(b) > TARGET_WORDS,
+        f"Shorten the body to under {TARGET_WORDS} words, keeping the strongest points.",
+        _trim_long,
+    ),
+    Rule("too_short", 2.0, lambda b: word_count(b) < 40, "Expand it to 80-150 words with one concrete overlap."),
+    Rule(
+        "no_resume_mention",
+        4.0,
+        lambda b: not _RESUME_ATTACHED_RE.search(b),
+        "Add one sentence saying my resume is attached.",
+    ),
+    Rule(
+        "no_call_invite",
+        2.0,
+        lambda b: not _INVITE_RE.search(b),
+        "End by inviting a short call or asking for guidance on the next steps.",
+    ),
+    Rule(
+        "bare_next_steps",
+        1.0,
+        lambda b: bool(_BARE_NEXT_STEPS_RE.search(b)),
+        'Write "the next steps", not "next steps".',
+        _add_definite_article,
+    ),
+    Rule(
+        "greeting",
+        3.0,
+        lambda b: bool(_GREETING_RE.search(b)),
+        "Remove the greeting line.",
+        _drop_lines(_GREETING_RE),
+    ),
+    Rule(
+        "signoff",
+        3.0,
+        lambda b: bool(_SIGNOFF_RE.search(b)),
+        "Remove the signoff line.",
+        _drop_lines(_SIGNOFF_RE),
+    ),
+    Rule(
+        "placeholder",
+        5.0,
+        lambda b: bool(_PLACEHOLDER_RE.search(b)),
+        "Replace bracketed placeholders with real wording or remove them.",
+    ),
+    Rule("cliche", 1.0, lambda b: bool(_CLICHES_RE.search(b)), "Replace corporate cliches with specific wording."),
+    Rule(
+        "apologetic",
+        2.0,
+        lambda b: bool(_DESPERATE_RE.search(b)),
+        "Remove apologetic or desperate phrasing; keep a confident tone.",
+    ),
+)
+
+
+def compile_avoid_phrases(phrases: Iterable[str]) -> re.Pattern | None:
+    """One alternation regex for the style profile's phrases_to_avoid (None if empty)."""
+    cleaned = sorted({p.strip() for p in phrases if p and p.strip()}, key=len, reverse=True)
+    if not cleaned:
+        return None
+    return re.compile(r"\b(" + "|".join(re.escape(p) for p in cleaned) + r")\b", re.IGNORECASE)
+
+
+def violations(body: str, avoid: re.Pattern | None = None) -> list[str]:
+    """Names of the rules the body breaks."""
+    names = [rule.name for rule in RULES if rule.violated(body)]
+    if avoid is not None and avoid.search(body):
+        names.append("avoided_phrase")
+    return names
+
+
+_WEIGHTS = {rule.name: rule.weight for rule in RULES} | {"avoided_phrase": 1.0}
+
+
+def penalty(names: list[str]) -> float:
+    """Total weight of the given violations."""
+    return sum(_WEIGHTS[name] for name in names)
+
+
+def rank(bodies: list[str], avoid: re.Pattern | None = None) -> list[tuple[int, float, list[str]]]:
+    """
+    (index, penalty, violations) for each body, best first. Ties prefer the
+    body closest to TARGET_WORDS, then the earlier candidate.
+    """
+    scored = []
+    for i, body in enumerate(bodies):
+        names = violations(body, avoid)
+        scored.append((i, penalty(names), names))
+    scored.sort(key=lambda s: (s[1], abs(word_count(bodies[s[0]]) - TARGET_WORDS), s[0]))
+    return scored
+
+
+_RULES_BY_NAME = {rule.name: rule for rule in RULES}
+
+
+@dataclass
+class Validation:
+    body: str
+    fixed: list[str] = field(default_factory=list)  # rules fixed deterministically
+    remaining: list[str] = field(default_factory=list)  # rules still broken
+
+    @property
+    def ok(self) -> bool:
+        return not self.remaining
+
+
+def validate(body: str, avoid: re.Pattern | None = None) -> Validation:
+    """Apply every deterministic fix whose rule is broken, then re-check."""
+    fixed = []
+    for name in violations(body, avoid):
+        rule = _RULES_BY_NAME.get(name)
+        if rule is None or rule.fix is None:
+            continue
+        candidate = rule.fix(body)
+        if candidate != body and not rule.violated(candidate):
+            body = candidate
+            fixed.append(name)
+    return Validation(body, fixed, violations(body, avoid))
+
+
+def repair_messages(body: str, remaining: list[str], avoid: re.Pattern | None = None) -> list[dict]:
+    """A small edit prompt listing only the failed rules (no background or JD)."""
+    problems = []
+    for name in remaining:
+        if name == "avoided_phrase" and avoid is not None:
+            found = sorted({m.group(0) for m in avoid.finditer(body)})
+            problems.append(f"Rephrase to avoid: {', '.join(found)}.")
+        elif name in _RULES_BY_NAME:
+            problems.append(_RULES_BY_NAME[name].hint)
+    fixes = "\n".join(f"- {p}" for p in problems)
+    return [
+        {
+            "role": "system",
+            "content": "You edit outreach emails. Change only what is asked and keep everything else as is.",
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Fix these problems in the email body below:\n{fixes}\n\n"
+                "Keep first person, no greeting and no signoff. Return only the revised body.\n\n"
+                f"BODY:\n{body}"
+            ),
+        },
+    ]
+
+
+class ValidationStats:
+    """Per-run outcome counts: pass (as generated), fixed (deterministic), repaired (model), failed."""
+
+    OUTCOMES = ("pass", "fixed", "repaired", "failed")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.failed_rules: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, remaining: list[str] = ()) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+            for name in remaining:
+                self.failed_rules[name] = self.failed_rules.get(name, 0) + 1
+
+    def summary(self) -> str:
+        total = sum(self.counts.values())
+        rates = ", ".join(f"{k} {v} ({100.0 * v / total:.0f}%)" for k, v in self.counts.items())
+        line = f"[VALIDATE] {total} bodies: {rates}"
+        if self.failed_rules:
+            line += "; still failing: " + ", ".join(f"{k}={v}" for k, v in sorted(self.failed_rules.items()))
+        return line
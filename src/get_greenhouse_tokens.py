@@ -1,15 +1,12 @@
 import os
 import re
-import time
 from pathlib import Path
 from urllib.parse import urlparse
 
-import requests
 from dotenv import load_dotenv
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+
+from .google_services import get_service
+from .http_scheduler import get_scheduler
 
 load_dotenv()
 
@@ -63,7 +60,7 @@ def extract_greenhouse_token_from_url(url: str):
     
     # Quick HEAD request to verify the board exists
     try:
-        resp = requests.head(url, timeout=5, allow_redirects=True)
+        resp = get_scheduler().head(url, timeout=5, allow_redirects=True)
         if resp.status_code == 200 or resp.status_code == 403:  # 403 OK (access restricted)
             return token
     except Exception:
@@ -88,30 +85,9 @@ def find_greenhouse_token_for_company(company_name: str):
     return None
 
 
-def get_credentials():
-    """Get or refresh Google Sheets API credentials."""
-    creds = None
-    if TOKEN_PATH.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), SCOPES)
-        except Exception:
-            try:
-                TOKEN_PATH.unlink()
-            except Exception:
-                pass
-            creds = None
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not CREDENTIALS_PATH.exists():
-                raise FileNotFoundError("credentials.json not found in project root")
-            flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_PATH), SCOPES)
-            creds = flow.run_local_server(port=0)
-        with TOKEN_PATH.open("w", encoding="utf-8") as f:
-            f.write(creds.to_json())
-    return creds
+def get_sheets_service():
+    """Sheets service (read/write scope) from the shared Google service manager."""
+    return get_service("sheets", "v4", SCOPES, TOKEN_PATH, CREDENTIALS_PATH)
 
 def main():
     """Read companies from Google Sheets, look up Greenhouse tokens, write back in-place."""
@@ -123,9 +99,7 @@ def main():
     parser.add_argument("--limit", type=int, default=None, help="Limit to first N companies (for testing)")
     args = parser.parse_args()
 
-    # Get credentials and build service
-    creds = get_credentials()
-    service = build("sheets", "v4", credentials=creds)
+    service = get_sheets_service()
 
     # Read data from sheet
     range_name = f"'{args.sheet_name}'!A1:Z1000"
@@ -184,7 +158,6 @@ def main():
         row[col_idx] = token or ""
         updated_values.append(row)
         processed_count += 1
-        time.sleep(1.0)
 
     # Write all rows back to sheet
     service.spreadsheets().values().update(
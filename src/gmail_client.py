@@ -1,37 +1,12 @@
 # src/gmail_client.py
 
-import os
-import os.path
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from .google_services import get_service
 
 # We only need compose permission (create & manage drafts)
 SCOPES = ["https://www.googleapis.com/auth/gmail.compose"]
+TOKEN_PATH = "token.json"
 
 
 def get_gmail_service():
-    """Return an authenticated Gmail API service, using token.json if available."""
-    creds = None
-
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-
-    # Refresh or create credentials if needed
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # This will open a browser window the first time
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials.json", SCOPES
-            )
-            creds = flow.run_local_server(port=0)
-
-        # Save the credentials for next run
-        with open("token.json", "w", encoding="utf-8") as token:
-            token.write(creds.to_json())
-
-    service = build("gmail", "v1", credentials=creds)
-    return service
+    """Return the process-wide authenticated Gmail API service, using token.json if available."""
+    return get_service("gmail", "v1", SCOPES, TOKEN_PATH)
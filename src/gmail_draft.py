@@ -2,7 +2,14 @@
 
 import os
 import base64
+import hashlib
+import io
 import mimetypes
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
@@ -11,11 +18,323 @@ from email import encoders
 from .gmail_client import get_gmail_service
 
 
+# Gmail accepts up to 100 calls per batch but starts rate limiting well before
+# that; each call here also carries a base64 resume, so keep batches modest.
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "20"))
+# Media uploads above this size switch to the resumable protocol.
+RESUMABLE_THRESHOLD = int(os.getenv("GMAIL_RESUMABLE_THRESHOLD", str(5 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # must be a multiple of 256 KiB
+
+# Gmail API per-user quota: 250 units/s, and each method has a unit cost.
+GMAIL_QUOTA_UNITS_PER_SECOND = float(os.getenv("GMAIL_QUOTA_UNITS_PER_SECOND", "250"))
+# Fraction of the limit to pace at; a little headroom avoids most 429s.
+GMAIL_QUOTA_TARGET = float(os.getenv("GMAIL_QUOTA_TARGET", "0.9"))
+GMAIL_MAX_RETRIES = int(os.getenv("GMAIL_MAX_RETRIES", "4"))
+QUOTA_COST = {"drafts.create": 10}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+MAX_RETRY_AFTER = 120.0
+
+
+@dataclass(frozen=True)
+class EncodedAttachment:
+    """
+    A resume encoded once as a MIME part, plus the urlsafe-base64 of its
+    3-byte-aligned prefix, so per-draft encoding only touches the envelope.
+    """
+
+    sha256: str
+    part: bytes  # serialized MIME part: headers + base64 body
+    raw_b64: str  # urlsafe_b64encode(part[:aligned])
+    raw_tail: bytes  # part[aligned:], 0-2 bytes folded into the suffix
+
+
+_attachments: dict[tuple[str, int, int], EncodedAttachment] = {}
+_attachments_by_hash: dict[tuple[str, str], EncodedAttachment] = {}
+_attachments_lock = threading.Lock()
+
+
+def _encode_attachment(resume_path: str, data: bytes) -> EncodedAttachment:
+    mime_type, _ = mimetypes.guess_type(resume_path)
+    if mime_type is None:
+        mime_type = "application/octet-stream"
+    main_type, sub_type = mime_type.split("/", 1)
+
+    part = MIMEBase(main_type, sub_type)
+    part.set_payload(data)
+    encoders.encode_base64(part)
+    part.add_header(
+        "Content-Disposition",
+        f'attachment; filename="{os.path.basename(resume_path)}"',
+    )
+    part_bytes = part.as_bytes()
+    aligned = len(part_bytes) - len(part_bytes) % 3
+    return EncodedAttachment(
+        sha256=hashlib.sha256(data).hexdigest(),
+        part=part_bytes,
+        raw_b64=base64.urlsafe_b64encode(part_bytes[:aligned]).decode("ascii"),
+        raw_tail=part_bytes[aligned:],
+    )
+
+
+def get_encoded_attachment(resume_path: str) -> EncodedAttachment:
+    """
+    The resume's encoded MIME part, cached in memory by (path, mtime, size);
+    a changed file is re-read and re-encoded only if its SHA-256 changed.
+    """
+    if not os.path.exists(resume_path):
+        raise FileNotFoundError(f"Resume file not found at: {resume_path}")
+
+    path = os.path.abspath(resume_path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _attachments_lock:
+        cached = _attachments.get(key)
+    if cached is not None:
+        return cached
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    with _attachments_lock:
+        encoded = _attachments_by_hash.get((path, digest))
+        if encoded is None:
+            encoded = _encode_attachment(resume_path, data)
+            _attachments_by_hash[(path, digest)] = encoded
+        _attachments[key] = encoded
+    return encoded
+
+
+def _envelope(to_email: str, subject: str, html_body: str) -> tuple[bytes, bytes, bytes]:
+    """
+    (head, suffix, boundary) of the multipart message around the attachment
+    part: head is everything before the attachment's opening delimiter,
+    suffix closes the message.
+    """
+    message = MIMEMultipart()
+    message["to"] = to_email
+    message["subject"] = subject
+    message.attach(MIMEText(html_body, "html"))
+
+    envelope = message.as_bytes()
+    boundary = message.get_boundary().encode("ascii")
+    closing = b"--" + boundary + b"--\n"
+    return envelope[: envelope.rindex(closing)], b"\n" + closing, boundary
+
+
+def build_message_bytes(
+    to_email: str,
+    subject: str,
+    html_body: str,
+    resume_path: str,
+) -> bytes:
+    """The RFC 822 message: HTML body + attached resume (spliced in pre-encoded)."""
+    attachment = get_encoded_attachment(resume_path)
+    head, suffix, boundary = _envelope(to_email, subject, html_body)
+    return head + b"--" + boundary + b"\n" + attachment.part + suffix
+
+
+def build_draft_body(
+    to_email: str,
+    subject: str,
+    html_body: str,
+    resume_path: str,
+) -> dict:
+    """
+    MIME message (HTML body + attached resume) encoded as a drafts.create body.
+
+    The raw field is base64 of the whole message. Instead of re-encoding the
+    resume for every draft, the envelope head is padded to a multiple of 3
+    bytes (extra blank lines at the end of the HTML part), so the cached
+    base64 of the attachment can be concatenated as-is.
+    """
+    attachment = get_encoded_attachment(resume_path)
+    head, suffix, boundary = _envelope(to_email, subject, html_body)
+    head += b"\n" * (-(len(head) + len(boundary) + 3) % 3)
+    head += b"--" + boundary + b"\n"
+
+    raw = "".join(
+        (
+            base64.urlsafe_b64encode(head).decode("ascii"),
+            attachment.raw_b64,
+            base64.urlsafe_b64encode(attachment.raw_tail + suffix).decode("ascii"),
+        )
+    )
+    return {"message": {"raw": raw}}
+
+
+def media_draft_request(drafts, message_bytes: bytes):
+    """
+    drafts.create via the media upload endpoint: the RFC 822 bytes are sent
+    as-is (message/rfc822) instead of base64 inside JSON, so the resume is
+    base64-encoded once (inside the MIME part) rather than twice. Messages
+    over RESUMABLE_THRESHOLD use a resumable upload in UPLOAD_CHUNK_SIZE chunks.
+    """
+    from googleapiclient.http import MediaIoBaseUpload
+
+    resumable = len(message_bytes) > RESUMABLE_THRESHOLD
+    media = MediaIoBaseUpload(
+        io.BytesIO(message_bytes),
+        mimetype="message/rfc822",
+        chunksize=UPLOAD_CHUNK_SIZE,
+        resumable=resumable,
+    )
+    return drafts.create(userId="me", media_body=media)
+
+
+def _is_rate_limited(exc) -> bool:
+    """429, or 403 with a rate-limit reason (Gmail uses both)."""
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    if status == 429:
+        return True
+    if status == 403:
+        content = getattr(exc, "content", b"") or b""
+        text = content.decode("utf-8", "replace") if isinstance(content, bytes) else str(content)
+        return any(reason in text for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def _retry_after(exc) -> float | None:
+    resp = getattr(exc, "resp", None)
+    value = resp.get("retry-after") if resp is not None else None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None
+
+
+class QuotaScheduler:
+    """
+    Paces Gmail calls by quota units rather than requests.
+
+    - A token bucket holds units and refills at GMAIL_QUOTA_TARGET of the
+      per-user limit, with at most one second of burst
+    - Rate-limit errors halve the refill rate and pause all calls for the
+      backoff (Retry-After when given, else jittered exponential); successful
+      calls win it back by half their units, so about a second of clean
+      traffic restores half the target rate
+    - Counts calls, units, waits and rate-limit errors so summary() can show
+      how close a run came to the limit
+    """
+
+    def __init__(
+        self,
+        units_per_second: float = GMAIL_QUOTA_UNITS_PER_SECOND,
+        target: float = GMAIL_QUOTA_TARGET,
+        max_retries: int = GMAIL_MAX_RETRIES,
+        backoff_base: float = 1.0,
+    ):
+        self.limit = units_per_second
+        self.base_rate = units_per_second * target
+        self.rate = self.base_rate
+        self.capacity = self.base_rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+        self.calls: dict[str, int] = {}
+        self.units = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.waited = 0.0
+        self._first: float | None = None
+        self._last: float | None = None
+        self._lock = threading.Lock()
+
+    def acquire(self, method: str, count: int = 1) -> None:
+        """Block until `count` calls of `method` fit under the quota, then charge them."""
+        units = QUOTA_COST.get(method, 1) * count
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= units
+            wait = max(self.paused_until - now, -self.tokens / self.rate if self.tokens < 0 else 0.0)
+            # Retried calls count too: Gmail charges quota for every attempt.
+            self.calls[method] = self.calls.get(method, 0) + count
+            self.units += units
+            self.waited += wait
+            if self._first is None:
+                self._first = now + wait
+        if wait:
+            time.sleep(wait)
+
+    def done(self, method: str, ok_count: int = 1) -> None:
+        """Mark the end of a call or batch in which ok_count calls were not rate limited."""
+        with self._lock:
+            self._last = time.monotonic()
+            self.rate = min(self.base_rate, self.rate + QUOTA_COST.get(method, 1) * ok_count / 2)
+
+    def throttle(self, attempt: int, retry_after: float | None = None) -> float:
+        """Record a rate-limit error; slow down, pause everyone and return the backoff delay."""
+        delay = retry_after if retry_after is not None else self.backoff_base * (2**attempt) * random.uniform(0.5, 1.5)
+        with self._lock:
+            self.rate_limited += 1
+            self.rate = max(self.base_rate / 8, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+    def execute(self, request, method: str = "drafts.create"):
+        """request.execute() under the quota, retrying rate-limit errors with backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(method)
+            try:
+                result = request.execute()
+            except Exception as e:
+                limited = _is_rate_limited(e)
+                self.done(method, ok_count=0 if limited else 1)
+                if not limited or attempt == self.max_retries:
+                    raise
+                delay = self.throttle(attempt, _retry_after(e))
+                self.retries += 1
+                print(f"[GMAIL] Rate limited on {method}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                continue
+            self.done(method)
+            return result
+
+    def summary(self) -> str:
+        calls = ", ".join(f"{n} {method}" for method, n in self.calls.items())
+        elapsed = (self._last - self._first) if self._first is not None and self._last is not None else 0.0
+        line = f"[QUOTA] {calls} = {self.units} units in {elapsed:.1f}s"
+        if elapsed > 0 and self.units > self.capacity:
+            # The first second's burst goes out at once; rate the paced remainder.
+            rate = (self.units - self.capacity) / elapsed
+            line += (
+                f": {rate:.0f} units/s sustained, "
+                f"{100.0 * rate / self.limit:.0f}% of the {self.limit:.0f}/s per-user limit"
+            )
+        return (
+            line + f"; {self.rate_limited} rate-limited, {self.retries} retried, "
+            f"{self.waited:.1f}s spent pacing"
+        )
+
+
+_quota: QuotaScheduler | None = None
+_quota_lock = threading.Lock()
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Return the process-wide scheduler (the quota is per user, not per call site)."""
+    global _quota
+    with _quota_lock:
+        if _quota is None:
+            _quota = QuotaScheduler()
+    return _quota
+
+
+def report_gmail_quota() -> None:
+    """Print quota usage for this run (no-op if no Gmail call was made)."""
+    if _quota is not None and _quota.calls:
+        print(_quota.summary())
+
+
 def create_draft_with_resume(
     to_email: str,
     subject: str,
     html_body: str,
     resume_path: str,
+    upload: str = "media",
 ):
     """
     Create a Gmail draft with:
@@ -23,46 +342,135 @@ def create_draft_with_resume(
     - subject
     - HTML body
     - attached resume file
+
+    upload="media" (default) sends the raw message through the media upload
+    endpoint; upload="raw" sends it base64-encoded in the JSON body.
     """
+    drafts = get_gmail_service().users().drafts()
+    if upload == "media":
+        request = media_draft_request(drafts, build_message_bytes(to_email, subject, html_body, resume_path))
+    else:
+        request = drafts.create(userId="me", body=build_draft_body(to_email, subject, html_body, resume_path))
+    draft = get_quota_scheduler().execute(request)
 
-    if not os.path.exists(resume_path):
-        raise FileNotFoundError(f"Resume file not found at: {resume_path}")
+    print(f"[GMAIL] Draft created with id: {draft.get('id')}")
+    return draft
 
-    # Build MIME message
-    message = MIMEMultipart()
-    message["to"] = to_email
-    message["subject"] = subject
 
-    # Attach HTML body
-    message.attach(MIMEText(html_body, "html"))
+def _create_drafts_media(messages: list[dict], results: list, on_result: Callable | None) -> None:
+    drafts = None
+    scheduler = get_quota_scheduler()
+    for i, message in enumerate(messages):
+        try:
+            message_bytes = build_message_bytes(**message)
+            if drafts is None:
+                drafts = get_gmail_service().users().drafts()
+            results[i] = scheduler.execute(media_draft_request(drafts, message_bytes))
+        except Exception as e:
+            results[i] = e
+        if on_result is not None:
+            on_result(i, results[i])
 
-    # Attach resume
-    mime_type, _ = mimetypes.guess_type(resume_path)
-    if mime_type is None:
-        mime_type = "application/octet-stream"
-    main_type, sub_type = mime_type.split("/", 1)
 
-    with open(resume_path, "rb") as f:
-        part = MIMEBase(main_type, sub_type)
-        part.set_payload(f.read())
-        encoders.encode_base64(part)
-        part.add_header(
-            "Content-Disposition",
-            f'attachment; filename="{os.path.basename(resume_path)}"',
-        )
-        message.attach(part)
-
-    # Encode for Gmail API
-    raw = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
-    draft_body = {"message": {"raw": raw}}
-
-    service = get_gmail_service()
-    draft = (
-        service.users()
-        .drafts()
-        .create(userId="me", body=draft_body)
-        .execute()
-    )
+def create_drafts(
+    messages: list[dict],
+    batch_size: int = GMAIL_BATCH_SIZE,
+    upload: str = "batch",
+    on_result: Callable[[int, object], None] | None = None,
+) -> list:
+    """
+    Bulk create_draft_with_resume: each message is a dict of its keyword
+    arguments (to_email, subject, html_body, resume_path).
 
-    print(f"[GMAIL] Draft created with id: {draft.get('id')}")
-    return draft
+    upload="batch" (default): drafts are sent as Gmail batch requests of up to
+    batch_size calls, so N drafts cost ceil(N / batch_size) HTTP round trips
+    instead of N, but each carries the base64 raw message in JSON.
+    upload="media": one media upload per draft (batch requests cannot carry
+    media), sending ~25% fewer bytes per draft; better on slow uplinks or
+    with large resumes.
+
+    Both paths are paced by the quota scheduler (a batch is charged for every
+    call in it); drafts that hit a rate limit are retried with backoff, in a
+    later batch on the batch path.
+
+    Returns one entry per message, in order: the created draft (dict with
+    "id") or the exception for that message. One failure never affects the
+    others. on_result(index, result), if given, is called as soon as each
+    result is known (after each batch), so callers can persist progress.
+    """
+    results: list = [None] * len(messages)
+    if upload == "media":
+        _create_drafts_media(messages, results, on_result)
+        return results
+
+    pending: list[tuple[int, dict]] = []
+    for i, message in enumerate(messages):
+        try:
+            pending.append((i, build_draft_body(**message)))
+        except Exception as e:
+            results[i] = e
+            if on_result is not None:
+                on_result(i, e)
+
+    if not pending:
+        return results
+
+    try:
+        service = get_gmail_service()
+        drafts = service.users().drafts()
+    except Exception as e:
+        # No credentials / auth failed: every pending draft fails, as on the media path.
+        for i, _ in pending:
+            results[i] = e
+            if on_result is not None:
+                on_result(i, e)
+        return results
+
+    def on_response(request_id, response, exception):
+        results[int(request_id)] = exception if exception is not None else response
+
+    scheduler = get_quota_scheduler()
+    attempts: dict[int, int] = {}
+    batch_size = max(1, min(100, batch_size))
+    batch_number = 0
+    while pending:
+        chunk, pending = pending[:batch_size], pending[batch_size:]
+        batch_number += 1
+        batch = service.new_batch_http_request(callback=on_response)
+        for i, body in chunk:
+            results[i] = None
+            batch.add(drafts.create(userId="me", body=body), request_id=str(i))
+        scheduler.acquire("drafts.create", len(chunk))
+        try:
+            batch.execute()
+        except Exception as e:
+            # The batch call itself failed (network, auth): every draft in it failed.
+            for i, _ in chunk:
+                if results[i] is None:
+                    results[i] = e
+        print(f"[GMAIL] Batch {batch_number}: sent {len(chunk)} drafts in one request")
+
+        limited = [
+            (i, body)
+            for i, body in chunk
+            if _is_rate_limited(results[i]) and attempts.get(i, 0) < scheduler.max_retries
+        ]
+        scheduler.done("drafts.create", ok_count=len(chunk) - len(limited))
+        if limited:
+            attempt = max(attempts.get(i, 0) for i, _ in limited)
+            retry_after = max((_retry_after(results[i]) or 0.0 for i, _ in limited), default=0.0)
+            delay = scheduler.throttle(attempt, retry_after or None)
+            scheduler.retries += len(limited)
+            for i, _ in limited:
+                attempts[i] = attempts.get(i, 0) + 1
+            print(f"[GMAIL] {len(limited)} drafts rate limited, retrying in {delay:.1f}s")
+            # Retry first so they keep their place ahead of drafts not yet sent.
+            pending = limited + pending
+
+        if on_result is not None:
+            retrying = {i for i, _ in limited}
+            for i, _ in chunk:
+                if i not in retrying:
+                    on_result(i, results[i])
+
+    return results
@@ -0,0 +1,133 @@
+# src/google_services.py
+
+"""
+Process-wide Google API credentials and service objects (Gmail, Sheets).
+
+- Credentials are loaded from their token file once per (token file, scopes)
+  and refreshed proactively when they are within REFRESH_MARGIN of expiry,
+  so a long batch never stalls on a 401 + refresh round trip
+- Services are built once from the discovery documents bundled with
+  google-api-python-client (static_discovery=True: no discovery HTTP call)
+- Every service built on the same credentials shares one authorized HTTP
+  transport (one keep-alive connection pool)
+
+httplib2 transports are not thread-safe; services are meant to be used from
+the main thread, which is how the CLIs call them.
+"""
+
+import datetime
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+CREDENTIALS_PATH = Path("credentials.json")
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "60"))
+
+_CredKey = Tuple[str, Tuple[str, ...]]
+
+_credentials: Dict[_CredKey, object] = {}
+_transports: Dict[_CredKey, object] = {}
+_services: Dict[Tuple[str, str, _CredKey], object] = {}
+_lock = threading.RLock()
+
+
+def _key(scopes, token_path) -> _CredKey:
+    return str(token_path), tuple(sorted(scopes))
+
+
+def _save(creds, token_path: Path) -> None:
+    with token_path.open("w", encoding="utf-8") as f:
+        f.write(creds.to_json())
+
+
+def _load_or_authorize(scopes: list[str], token_path: Path, credentials_path: Path):
+    # Google client libraries are slow to import; only pay for them on first use.
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    creds = None
+    if token_path.exists():
+        try:
+            creds = Credentials.from_authorized_user_file(str(token_path), scopes)
+        except Exception:
+            # Unreadable token file: discard it and log in again.
+            try:
+                token_path.unlink()
+            except Exception:
+                pass
+            creds = None
+
+    if creds and creds.valid:
+        return creds
+
+    if creds and creds.expired and creds.refresh_token:
+        creds.refresh(Request())
+    else:
+        if not credentials_path.exists():
+            raise FileNotFoundError(f"{credentials_path} not found. Put your Google OAuth client file in project root.")
+        # This will open a browser window the first time
+        flow = InstalledAppFlow.from_client_secrets_file(str(credentials_path), scopes)
+        creds = flow.run_local_server(port=0)
+
+    # Save the credentials for next run
+    _save(creds, token_path)
+    return creds
+
+
+def _expires_soon(creds) -> bool:
+    if not creds.expiry:
+        return False
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return creds.expiry - now < REFRESH_MARGIN
+
+
+def get_credentials(scopes: list[str], token_path: str | Path, credentials_path: str | Path = CREDENTIALS_PATH):
+    """Cached OAuth credentials for these scopes, refreshed if they expire within REFRESH_MARGIN."""
+    token_path, credentials_path = Path(token_path), Path(credentials_path)
+    key = _key(scopes, token_path)
+    with _lock:
+        creds = _credentials.get(key)
+        if creds is None:
+            creds = _credentials[key] = _load_or_authorize(scopes, token_path, credentials_path)
+        elif creds.refresh_token and (not creds.valid or _expires_soon(creds)):
+            from google.auth.transport.requests import Request
+
+            creds.refresh(Request())
+            _save(creds, token_path)
+        return creds
+
+
+def get_service(
+    api: str,
+    version: str,
+    scopes: list[str],
+    token_path: str | Path,
+    credentials_path: str | Path = CREDENTIALS_PATH,
+):
+    """Cached discovery-based service (e.g. "gmail", "v1") on shared credentials and transport."""
+    key = _key(scopes, Path(token_path))
+    with _lock:
+        # Refresh check on every call; cheap unless a refresh is actually due.
+        creds = get_credentials(scopes, token_path, credentials_path)
+        service = _services.get((api, version, key))
+        if service is not None:
+            return service
+
+        import google_auth_httplib2
+        import httplib2
+        from googleapiclient.discovery import build
+
+        http = _transports.get(key)
+        if http is None:
+            raw_http = httplib2.Http(timeout=HTTP_TIMEOUT)
+            # Resumable uploads answer 308 for "chunk received"; it is not a redirect
+            # (same as googleapiclient.http.build_http).
+            raw_http.redirect_codes = raw_http.redirect_codes - {308}
+            http = _transports[key] = google_auth_httplib2.AuthorizedHttp(creds, http=raw_http)
+        service = build(api, version, http=http, static_discovery=True, cache_discovery=False)
+        _services[(api, version, key)] = service
+        return service
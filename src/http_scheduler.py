@@ -0,0 +1,241 @@
+# src/http_scheduler.py
+
+"""
+One politeness scheduler for every outbound HTTP call (scraper, Hunter,
+Greenhouse probes).
+
+- A token bucket per host caps the request rate
+- Semaphores cap concurrent requests per host and overall
+- 429 / 503 responses pause the host (honoring Retry-After), halve its rate
+  and retry with jittered exponential backoff; successes slowly restore it
+- All requests share one pooled keep-alive requests.Session
+
+Connection limits cover a request until its body is read: with stream=True
+the slots stay taken until the caller closes the response (or it is garbage
+collected), so callers that stream must close what they get back.
+"""
+
+import email.utils
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+PER_HOST_RPS = float(os.getenv("HTTP_PER_HOST_RPS", "2.0"))
+PER_HOST_BURST = int(os.getenv("HTTP_PER_HOST_BURST", "4"))
+PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "4"))
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "16"))
+
+# Hosts with documented or observed limits that differ from the default.
+HOST_RPS: Dict[str, float] = {
+    "api.hunter.io": 10.0,  # Hunter allows 15 req/s on domain-search
+    "boards-api.greenhouse.io": 5.0,
+    "api.lever.co": 5.0,
+}
+
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 120.0
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token, returning how long the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1.0
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def slow_down(self) -> None:
+        with self.lock:
+            self.rate = max(self.base_rate / 16, self.rate / 2)
+
+    def speed_up(self) -> None:
+        with self.lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: int, connections: int):
+        self.bucket = _TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(connections)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def pause_remaining(self) -> float:
+        with self.lock:
+            return max(0.0, self.paused_until - time.monotonic())
+
+
+def _slot_releaser(*slots: threading.BoundedSemaphore):
+    """Release each slot once, however many times the result is called."""
+    lock = threading.Lock()
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        with lock:
+            if released:
+                return
+            released = True
+        for slot in slots:
+            slot.release()
+
+    return release
+
+
+def _release_on_close(resp: requests.Response, release) -> None:
+    """Keep the slots of a streamed response until it is closed or collected."""
+    close = resp.close
+
+    def close_and_release() -> None:
+        try:
+            close()
+        finally:
+            release()
+
+    resp.close = close_and_release
+    weakref.finalize(resp, release)
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return min(MAX_RETRY_AFTER, max(0.0, when.timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpScheduler:
+    def __init__(
+        self,
+        per_host_rps: float = PER_HOST_RPS,
+        per_host_burst: int = PER_HOST_BURST,
+        per_host_connections: int = PER_HOST_CONNECTIONS,
+        max_connections: int = MAX_CONNECTIONS,
+        host_rps: Optional[Dict[str, float]] = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+    ):
+        self.per_host_rps = per_host_rps
+        self.per_host_burst = per_host_burst
+        self.per_host_connections = per_host_connections
+        self.host_rps = dict(HOST_RPS if host_rps is None else host_rps)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+        self._global_slots = threading.BoundedSemaphore(max_connections)
+        self._hosts: Dict[str, _HostState] = {}
+        self._hosts_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _host(self, host: str) -> _HostState:
+        with self._hosts_lock:
+            state = self._hosts.get(host)
+            if state is None:
+                rate = self.host_rps.get(host, self.per_host_rps)
+                state = _HostState(rate, self.per_host_burst, self.per_host_connections)
+                self._hosts[host] = state
+            return state
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session under the host's limits.
+        Returns the final response (which may still be a 429/503 once retries
+        are exhausted); network exceptions propagate to the caller.
+        """
+        host = (urlparse(url).hostname or "").lower()
+        state = self._host(host)
+
+        for attempt in range(self.max_retries + 1):
+            # Wait out any throttle pause and our turn in the bucket *before*
+            # taking a connection slot, and take the host's slot before a
+            # global one, so waiting never blocks other hosts.
+            pause = state.pause_remaining()
+            if pause:
+                time.sleep(pause)
+            wait = state.bucket.reserve()
+            if wait:
+                time.sleep(wait)
+
+            state.slots.acquire()
+            self._global_slots.acquire()
+            release = _slot_releaser(self._global_slots, state.slots)
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except BaseException:
+                release()
+                raise
+            if kwargs.get("stream"):
+                _release_on_close(resp, release)
+            else:
+                release()
+
+            if resp.status_code not in THROTTLE_STATUSES:
+                state.bucket.speed_up()
+                return resp
+
+            state.bucket.slow_down()
+            if attempt == self.max_retries:
+                return resp
+
+            delay = _retry_after_seconds(resp)
+            if delay is None:
+                delay = self.backoff_base * (2**attempt) * random.uniform(0.5, 1.5)
+            print(f"[HTTP] {resp.status_code} from {host}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+            resp.close()
+            state.pause(delay)
+
+        return resp  # unreachable; keeps type checkers happy
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+
+_scheduler: Optional[HttpScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> HttpScheduler:
+    """Return the process-wide scheduler shared by all modules."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HttpScheduler()
+    return _scheduler
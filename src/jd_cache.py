@@ -0,0 +1,206 @@
+# src/jd_cache.py
+
+"""
+Persistent on-disk cache for scraped job descriptions.
+
+Each entry is keyed by a SHA-256 of the normalized job URL and stored as two files:
+- <key>.html  raw page (or API payload) as downloaded
+- <key>.json  cleaned text + HTTP validators (ETag / Last-Modified) + timestamps
+
+Fresh entries (younger than the TTL) are served with no network and no parsing.
+Stale entries are revalidated with a conditional GET by the scraper.
+The directory is capped in size; the least recently used entries are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+JD_CACHE_DIR = os.getenv("JD_CACHE_DIR", ".cache/jd")
+JD_CACHE_TTL_HOURS = float(os.getenv("JD_CACHE_TTL_HOURS", "72"))
+JD_CACHE_MAX_MB = float(os.getenv("JD_CACHE_MAX_MB", "200"))
+
+# Query params that only track where a click came from; they never change the posting.
+TRACKING_PARAMS = {"gh_src", "source", "src", "ref", "referrer", "lever-source", "lever-origin"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a job URL so trivially different links share one cache entry:
+    lowercase scheme/host, drop 'www.', default ports, fragments,
+    utm_* / tracking params and trailing slashes, and sort the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    text: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+
+    def age_seconds(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class JDCache:
+    def __init__(
+        self,
+        cache_dir: str | Path = JD_CACHE_DIR,
+        ttl_hours: float = JD_CACHE_TTL_HOURS,
+        max_mb: float = JD_CACHE_MAX_MB,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = url_key(url)
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.html"
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for url (fresh or stale), or None."""
+        meta_path, _ = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Bump mtime so eviction sees this entry as recently used.
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return CacheEntry(
+            url=meta.get("url", url),
+            text=meta.get("text", ""),
+            etag=meta.get("etag", ""),
+            last_modified=meta.get("last_modified", ""),
+            fetched_at=float(meta.get("fetched_at", 0.0)),
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.age_seconds() < self.ttl_seconds
+
+    def get_raw(self, url: str) -> Optional[str]:
+        _, raw_path = self._paths(url)
+        try:
+            return raw_path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def put(
+        self,
+        url: str,
+        raw: str,
+        text: str,
+        etag: str = "",
+        last_modified: str = "",
+    ) -> None:
+        meta_path, raw_path = self._paths(url)
+        meta = {
+            "url": normalize_url(url),
+            "text": text,
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "fetched_at": time.time(),
+        }
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(raw_path, raw)
+        _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False))
+        self._evict()
+
+    def mark_revalidated(self, url: str, etag: str = "", last_modified: str = "") -> None:
+        """Record a 304 Not Modified: keep the text, restart the TTL clock."""
+        entry = self.get(url)
+        if entry is None:
+            return
+        meta_path, _ = self._paths(url)
+        meta = {
+            "url": entry.url,
+            "text": entry.text,
+            "etag": etag or entry.etag,
+            "last_modified": last_modified or entry.last_modified,
+            "fetched_at": time.time(),
+        }
+        _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False))
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the directory fits under max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for meta_path in self.cache_dir.glob("*.json"):
+                raw_path = meta_path.with_suffix(".html")
+                try:
+                    stat = meta_path.stat()
+                    size, used = stat.st_size, stat.st_mtime
+                    if raw_path.exists():
+                        size += raw_path.stat().st_size
+                except OSError:
+                    continue
+                total += size
+                entries.append((used, size, meta_path, raw_path))
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, meta_path, raw_path in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in (meta_path, raw_path):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+_cache: Optional[JDCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_jd_cache() -> JDCache:
+    """Return the process-wide cache built from the JD_CACHE_* env settings."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = JDCache()
+    return _cache
@@ -0,0 +1,150 @@
+# src/llm_cache.py
+
+"""
+Content-addressed on-disk cache for LLM completions (SQLite).
+
+The key is a SHA-256 over the model, the full message list (system prompt +
+fully rendered user prompt) and the sampling params, so any change to the
+prompt, JD, style profile or model produces a new key. Entries expire after
+LLM_CACHE_MAX_AGE_DAYS and the table is trimmed to LLM_CACHE_MAX_ENTRIES,
+least recently used first.
+
+- LLM_CACHE=0 (or configure_llm_cache(enabled=False)) turns the cache off
+- configure_llm_cache(refresh=True) skips lookups but still stores new results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+
+def make_key(model: str, messages: list[dict], params: dict | None = None) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        path: str | Path = LLM_CACHE_PATH,
+        max_age_days: float = LLM_CACHE_MAX_AGE_DAYS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        refresh: bool = False,
+    ):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_days * 86400
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.refresh:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.max_age_seconds:
+                self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, model: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, now),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM completions WHERE created_at < ?",
+                (time.time() - self.max_age_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        mode = " (refresh)" if self.refresh else ""
+        return f"[LLM-CACHE] {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate){mode}"
+
+
+_ENV_ENABLED = os.getenv("LLM_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+_enabled = _ENV_ENABLED
+_refresh = False
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def configure_llm_cache(enabled: bool = True, refresh: bool = False) -> None:
+    """Set CLI-level options; call before the first generation. LLM_CACHE=0 always wins."""
+    global _enabled, _refresh, _cache
+    with _cache_lock:
+        _enabled = enabled and _ENV_ENABLED
+        _refresh = refresh
+        _cache = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not _enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(refresh=_refresh)
+    return _cache
+
+
+def report_llm_cache() -> None:
+    """Print hit/miss counts for this run (no-op when the cache is disabled or unused)."""
+    if _cache is not None:
+        print(_cache.summary())
@@ -0,0 +1,80 @@
+# src/llm_client.py
+
+"""
+Lazily constructed OpenRouter clients shared by email_generator and style_profile.
+
+Nothing here touches the network, reads OPENROUTER_API_KEY or imports the
+openai package until a client is first requested, so importing the
+generators (and running --dry_run) works without a key.
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _api_key() -> str:
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENROUTER_API_KEY is not set in .env")
+    return api_key
+
+
+def get_client():
+    """Return the process-wide synchronous OpenAI client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            # Retries and fallbacks are handled by src.llm_resilience.
+            _client = OpenAI(api_key=_api_key(), base_url=OPENROUTER_BASE_URL, max_retries=0)
+    return _client
+
+
+def make_async_client(max_concurrency: int):
+    """
+    AsyncOpenAI client whose connection pool matches the batch concurrency,
+    with keep-alive and HTTP/2 (when the optional `h2` package is installed).
+
+    A new client per batch: httpx async pools are bound to the event loop
+    that created them, and each batch runs in its own asyncio.run().
+    """
+    import importlib
+
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+
+    # openai pins its own httpx flavour (httpx, or httpx2 in recent releases);
+    # take Limits from the package its default client is built on.
+    httpx = importlib.import_module(DefaultAsyncHttpxClient.__mro__[1].__module__.partition(".")[0])
+
+    try:
+        import h2  # noqa: F401
+
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    http_client = DefaultAsyncHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_concurrency,
+            keepalive_expiry=60.0,
+        ),
+        timeout=Timeout(60.0, connect=10.0),
+    )
+    return AsyncOpenAI(
+        api_key=_api_key(),
+        base_url=OPENROUTER_BASE_URL,
+        http_client=http_client,
+        max_retries=0,
+    )
@@ -0,0 +1,199 @@
+# src/llm_metrics.py
+
+"""
+Per-call accounting for OpenRouter generations (drafts and the style profile).
+
+Every attempt, whether served from the local cache, succeeded or failed, becomes one JSON
+line in LLM_METRICS_PATH with:
+- kind, label, model, cache status ("hit" / "miss" / "off")
+- prompt / completion tokens (estimated when the usage chunk never arrived,
+  e.g. because a stream was cut off past the word limit) and provider-cached
+  tokens (null when unknown)
+- time to first token and total latency (ms)
+- cost in USD: OpenRouter's reported usage.cost when present, otherwise
+  the MODEL_PRICES table
+
+report_llm_metrics() prints p50/p95/p99 latency, token totals and cost for the run.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .relevance import estimate_tokens
+
+
+LLM_METRICS_PATH = os.getenv("LLM_METRICS_PATH", "logs/llm_metrics.jsonl")
+
+# USD per 1M (prompt, completion) tokens; fallback when the response carries no cost.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "mistralai/mistral-7b-instruct": (0.028, 0.054),
+    "meta-llama/llama-3.1-8b-instruct": (0.02, 0.03),
+    "qwen/qwen-2.5-7b-instruct": (0.04, 0.10),
+}
+
+
+@dataclass
+class CallRecord:
+    kind: str
+    label: str
+    model: str
+    cache: str = "miss"
+    ok: bool = True
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: Optional[int] = None  # None: no usage reported
+    usage_estimated: bool = False
+    ttft_ms: Optional[float] = None
+    latency_ms: float = 0.0
+    cost_usd: float = 0.0
+    ts: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self._start = time.perf_counter()
+        self._usage = None
+        self.output = ""
+
+    def first_token(self) -> None:
+        if self.ttft_ms is None:
+            self.ttft_ms = round((time.perf_counter() - self._start) * 1000, 1)
+
+    def set_usage(self, usage) -> None:
+        self._usage = usage
+
+    def finish(self, messages: list[dict], output: str) -> None:
+        self.latency_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        usage = self._usage
+        if usage is not None:
+            self.prompt_tokens = usage.prompt_tokens or 0
+            self.completion_tokens = usage.completion_tokens or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            self.cached_tokens = (getattr(details, "cached_tokens", 0) if details is not None else 0) or 0
+        else:
+            self.usage_estimated = True
+            self.prompt_tokens = sum(estimate_tokens(_message_text(m)) for m in messages)
+            self.completion_tokens = estimate_tokens(output)
+
+        reported = getattr(usage, "cost", None) if usage is not None else None
+        if reported is not None:
+            self.cost_usd = float(reported)
+        else:
+            prompt_price, completion_price = MODEL_PRICES.get(self.model, (0.0, 0.0))
+            self.cost_usd = (self.prompt_tokens * prompt_price + self.completion_tokens * completion_price) / 1e6
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content)
+    return content
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class LLMMetrics:
+    def __init__(self, path: str | Path = LLM_METRICS_PATH):
+        self.path = Path(path)
+        self.records: list[CallRecord] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(
+        self,
+        kind: str,
+        model: str,
+        label: str,
+        messages: list[dict],
+        cache: str = "miss",
+    ) -> Iterator[CallRecord]:
+        """
+        Time one API attempt. Set `record.output` (and call first_token /
+        set_usage as data arrives); exceptions are recorded and re-raised.
+        """
+        record = CallRecord(kind=kind, label=label, model=model, cache=cache)
+        try:
+            yield record
+        except BaseException as e:
+            record.ok = False
+            record.error = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            record.finish(messages, record.output)
+            self._add(record)
+
+    def cache_hit(self, kind: str, model: str, label: str) -> None:
+        self._add(CallRecord(kind=kind, label=label, model=model, cache="hit"))
+
+    def _add(self, record: CallRecord) -> None:
+        line = json.dumps(asdict(record), ensure_ascii=False)
+        with self._lock:
+            self.records.append(record)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"[WARN] Could not write LLM metrics to {self.path}: {e}")
+
+    def summary(self) -> str:
+        with self._lock:
+            records = list(self.records)
+        calls = [r for r in records if r.cache != "hit"]
+        hits = len(records) - len(calls)
+        failed = sum(1 for r in calls if not r.ok)
+        latencies = sorted(r.latency_ms for r in calls if r.ok)
+        ttfts = sorted(r.ttft_ms for r in calls if r.ok and r.ttft_ms is not None)
+        prompt = sum(r.prompt_tokens for r in calls)
+        cached = sum(r.cached_tokens for r in calls if r.cached_tokens is not None)
+        completion = sum(r.completion_tokens for r in calls)
+        cost = sum(r.cost_usd for r in calls)
+        estimated = sum(1 for r in calls if r.usage_estimated)
+
+        lines = [
+            f"[METRICS] {len(calls)} API calls ({failed} failed), {hits} cache hits",
+            f"[METRICS] latency p50/p95/p99: "
+            + "/".join(f"{_percentile(latencies, p) / 1000:.2f}" for p in (50, 95, 99))
+            + "s",
+        ]
+        if ttfts:
+            lines.append(
+                "[METRICS] time to first token p50/p95/p99: "
+                + "/".join(f"{_percentile(ttfts, p) / 1000:.2f}" for p in (50, 95, 99))
+                + "s"
+            )
+        lines.append(
+            f"[METRICS] tokens: {prompt} prompt ({cached} provider-cached), {completion} completion"
+            + (f" ({estimated} calls estimated, cache use unknown)" if estimated else "")
+        )
+        lines.append(f"[METRICS] cost: ${cost:.4f}  (details in {self.path})")
+        return "\n".join(lines)
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics()
+    return _metrics
+
+
+def report_llm_metrics() -> None:
+    """Print the run summary (no-op if nothing was generated)."""
+    if _metrics is not None and _metrics.records:
+        print(_metrics.summary())
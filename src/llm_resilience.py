@@ -0,0 +1,271 @@
+# src/llm_resilience.py
+
+"""
+Failure handling for OpenRouter calls (email drafts and the style profile).
+
+- Each model in the fallback chain gets up to LLM_MAX_ATTEMPTS tries with
+  jittered exponential backoff on transient errors (429, 5xx, network)
+- A timeout (the model is slow) or a model-level error (404, bad output)
+  moves straight on to the next model in the chain
+- Every request has an overall deadline; per-attempt timeouts shrink to fit it
+- A circuit breaker per model skips a model that has recently been
+  unavailable for many requests, then lets a single trial request through
+  after a cooldown. Each request counts once per model, and only
+  availability failures (timeouts, 429, 5xx, network) count against it
+- Authentication errors fail fast: no other model would fare better
+
+When the whole chain fails, LLMUnavailableError is raised so callers can skip
+the item instead of emitting an error string as content.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Ordered fallbacks tried after the caller's primary model.
+FALLBACK_MODELS = [
+    m.strip()
+    for m in os.getenv(
+        "LLM_FALLBACK_MODELS",
+        "meta-llama/llama-3.1-8b-instruct,qwen/qwen-2.5-7b-instruct",
+    ).split(",")
+    if m.strip()
+]
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "45"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "120"))
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 20.0
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_ERROR_RATE = 0.5
+BREAKER_COOLDOWN = 30.0
+
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+FATAL_STATUSES = {401, 402, 403}
+
+
+class LLMUnavailableError(RuntimeError):
+    """Every model in the chain failed (or was skipped) for one request."""
+
+
+class EmptyCompletionError(ValueError):
+    """The model answered, but with no usable content."""
+
+
+def model_chain(primary: str) -> list[str]:
+    return [primary] + [m for m in FALLBACK_MODELS if m != primary]
+
+
+def _classify(exc: BaseException) -> str:
+    """'retry' (same model again), 'next' (move down the chain) or 'fatal'."""
+    name = type(exc).__name__
+    if "Timeout" in name or isinstance(exc, asyncio.TimeoutError):
+        return "next"
+    status = getattr(exc, "status_code", None)
+    if status in FATAL_STATUSES:
+        return "fatal"
+    if status in RETRYABLE_STATUSES or (status is not None and status >= 500):
+        return "retry"
+    if status is not None or isinstance(exc, ValueError):
+        # 400/404/422: this model can't serve the request; bad JSON / empty output
+        return "next"
+    # Connection resets, DNS failures and the like
+    return "retry"
+
+
+def _is_unavailable(exc: BaseException) -> bool:
+    """True if exc says the model is unreachable or overloaded, not that the request was bad."""
+    return _classify(exc) == "retry" or "Timeout" in type(exc).__name__ or isinstance(exc, asyncio.TimeoutError)
+
+
+class CircuitBreaker:
+    """Trips when the failure rate over the last BREAKER_WINDOW requests reaches BREAKER_ERROR_RATE."""
+
+    def __init__(
+        self,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            # Half-open: let one trial call through.
+            self._trial_in_flight = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self._opened_at is not None and self._trial_in_flight:
+                self._trial_in_flight = False
+                if ok:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = _breakers[model] = CircuitBreaker()
+        return breaker
+
+
+def _backoff(attempt: int) -> float:
+    return min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2**attempt)) * random.uniform(0.5, 1.5)
+
+
+class _Plan:
+    """Shared bookkeeping for the sync and async call loops."""
+
+    def __init__(self, primary: str, label: str, deadline: float):
+        self.models = model_chain(primary)
+        self.label = label
+        self.deadline_at = time.monotonic() + deadline
+        self.errors: list[str] = []
+        self.unavailable: set[str] = set()  # models that failed this request for availability reasons
+
+    def remaining(self) -> float:
+        return self.deadline_at - time.monotonic()
+
+    def attempt_timeout(self) -> float:
+        return max(1.0, min(LLM_ATTEMPT_TIMEOUT, self.remaining()))
+
+    def failed(self, model: str, attempt: int, exc: BaseException) -> tuple[str, float]:
+        """Record a failure; returns (action, delay before the next try of this model)."""
+        if _is_unavailable(exc):
+            self.unavailable.add(model)
+        action = _classify(exc)
+        self.errors.append(f"{model}: {type(exc).__name__}: {exc}")
+        delay = _backoff(attempt)
+        if action == "retry" and (attempt + 1 >= LLM_MAX_ATTEMPTS or delay >= self.remaining()):
+            action = "next"
+        if action == "retry":
+            print(f"[LLM] {self.label}: {model} failed ({type(exc).__name__}), retrying in {delay:.1f}s")
+        elif action == "next":
+            print(f"[LLM] {self.label}: giving up on {model} ({type(exc).__name__})")
+        return action, delay
+
+    def settle(self, model: str, ok: bool = False) -> None:
+        """
+        Record this request's outcome for model in its breaker, once:
+        a failure only if some attempt found the model unavailable.
+        """
+        get_breaker(model).record(ok or model not in self.unavailable)
+
+    def give_up(self) -> LLMUnavailableError:
+        detail = "; ".join(self.errors[-3:]) or "all models skipped by open circuit breakers"
+        return LLMUnavailableError(f"{self.label}: no model in {self.models} succeeded ({detail})")
+
+
+def call_with_fallback(
+    call: Callable[[str, float], T],
+    primary: str,
+    label: str = "request",
+    deadline: float = LLM_DEADLINE,
+) -> tuple[T, str]:
+    """
+    Run call(model, timeout) down the fallback chain until it succeeds.
+    Returns (result, model used); raises LLMUnavailableError when every model fails.
+    """
+    plan = _Plan(primary, label, deadline)
+    for model in plan.models:
+        if plan.remaining() <= 0:
+            raise plan.give_up()
+        if not get_breaker(model).allow():
+            print(f"[LLM] {label}: circuit open for {model}, skipping")
+            continue
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            if attempt and plan.remaining() <= 0:
+                break
+            try:
+                result = call(model, plan.attempt_timeout())
+            except Exception as e:
+                action, delay = plan.failed(model, attempt, e)
+                if action == "fatal":
+                    plan.settle(model)
+                    raise LLMUnavailableError(f"{label}: {e}") from e
+                if action == "next":
+                    break
+                time.sleep(delay)
+                continue
+            plan.settle(model, ok=True)
+            if model != primary:
+                print(f"[LLM] {label}: served by fallback model {model}")
+            return result, model
+        plan.settle(model)
+    raise plan.give_up()
+
+
+async def acall_with_fallback(
+    call: Callable[[str, float], Awaitable[T]],
+    primary: str,
+    label: str = "request",
+    deadline: float = LLM_DEADLINE,
+) -> tuple[T, str]:
+    """Async twin of call_with_fallback; each attempt is also bounded by asyncio.wait_for."""
+    plan = _Plan(primary, label, deadline)
+    for model in plan.models:
+        if plan.remaining() <= 0:
+            raise plan.give_up()
+        if not get_breaker(model).allow():
+            print(f"[LLM] {label}: circuit open for {model}, skipping")
+            continue
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            if attempt and plan.remaining() <= 0:
+                break
+            timeout = plan.attempt_timeout()
+            try:
+                result = await asyncio.wait_for(call(model, timeout), timeout)
+            except Exception as e:
+                action, delay = plan.failed(model, attempt, e)
+                if action == "fatal":
+                    plan.settle(model)
+                    raise LLMUnavailableError(f"{label}: {e}") from e
+                if action == "next":
+                    break
+                await asyncio.sleep(delay)
+                continue
+            plan.settle(model, ok=True)
+            if model != primary:
+                print(f"[LLM] {label}: served by fallback model {model}")
+            return result, model
+        plan.settle(model)
+    raise plan.give_up()
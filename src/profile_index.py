@@ -0,0 +1,168 @@
+# src/profile_index.py
+
+"""
+Bullet-level index over BACKGROUND so prompts carry only the matching experience.
+
+BACKGROUND is parsed once into sections ([HEADLINE], [RECENT EXPERIENCE], ...),
+role lines and bullets. Each bullet gets a precomputed BM25 term vector; the
+matrix is persisted next to the profile (profile_index.npz) together with a
+hash of the profile text, and rebuilt only when that text changes.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .profile import BACKGROUND
+from .relevance import bm25_doc_matrix, query_vector, tokenize
+
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "profile_index.npz")
+PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "8"))
+
+_SECTION_RE = re.compile(r"^\[(.+)\]$")
+
+
+@dataclass
+class ProfileIndex:
+    profile_hash: str
+    headline: str
+    sections: list[str]  # per bullet
+    roles: list[str]  # per bullet ("" outside experience sections)
+    bullets: list[str]
+    vocab: dict[str, int]
+    matrix: np.ndarray  # (bullets x vocab), BM25-weighted
+
+    def top_k(self, query: str, k: int) -> list[int]:
+        """Indices of the k best-matching bullets, in profile order."""
+        if not self.bullets or not self.vocab:
+            return []
+        scores = self.matrix @ query_vector(tokenize(query), self.vocab)
+        best = np.argsort(-scores, kind="stable")[:k]
+        return sorted(int(i) for i in best if scores[i] > 0)
+
+
+def _profile_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_background(text: str) -> tuple[str, list[str], list[str], list[str]]:
+    """Split BACKGROUND into (headline, sections, roles, bullets)."""
+    headline_lines = []
+    sections, roles, bullets = [], [], []
+    section, role = "", ""
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        match = _SECTION_RE.match(line)
+        if match:
+            section, role = match.group(1), ""
+        elif line.startswith("- "):
+            sections.append(section)
+            roles.append(role)
+            bullets.append(line[2:].strip())
+        elif section == "HEADLINE":
+            headline_lines.append(line)
+        else:
+            # e.g. "NielsenIQ — Data Scientist (2021–2025)"
+            role = line
+
+    return " ".join(headline_lines), sections, roles, bullets
+
+
+def build_profile_index(text: str = BACKGROUND) -> ProfileIndex:
+    headline, sections, roles, bullets = parse_background(text)
+    # Role lines carry the company/title words, so they count toward each bullet's match.
+    vocab, matrix = bm25_doc_matrix([tokenize(f"{r} {b}") for r, b in zip(roles, bullets)])
+    return ProfileIndex(_profile_hash(text), headline, sections, roles, bullets, vocab, matrix)
+
+
+def _save(index: ProfileIndex, path: str) -> None:
+    terms = sorted(index.vocab, key=index.vocab.get)
+    np.savez(
+        path,
+        profile_hash=np.array(index.profile_hash),
+        headline=np.array(index.headline),
+        sections=np.array(index.sections, dtype=str),
+        roles=np.array(index.roles, dtype=str),
+        bullets=np.array(index.bullets, dtype=str),
+        vocab=np.array(terms, dtype=str),
+        matrix=index.matrix,
+    )
+
+
+def _load(path: str, expected_hash: str) -> Optional[ProfileIndex]:
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["profile_hash"]) != expected_hash:
+                return None
+            return ProfileIndex(
+                profile_hash=expected_hash,
+                headline=str(data["headline"]),
+                sections=data["sections"].tolist(),
+                roles=data["roles"].tolist(),
+                bullets=data["bullets"].tolist(),
+                vocab={term: i for i, term in enumerate(data["vocab"].tolist())},
+                matrix=data["matrix"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+_index: Optional[ProfileIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_profile_index() -> ProfileIndex:
+    """Load the persisted index if it matches BACKGROUND, else rebuild and persist it (once per process)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            expected = _profile_hash(BACKGROUND)
+            _index = _load(INDEX_PATH, expected)
+            if _index is None:
+                _index = build_profile_index(BACKGROUND)
+                try:
+                    _save(_index, INDEX_PATH)
+                except OSError as e:
+                    print(f"[WARN] Could not persist profile index to {INDEX_PATH}: {e}")
+    return _index
+
+
+def get_headline() -> str:
+    return get_profile_index().headline
+
+
+def select_background(job_description: str, k: int = PROFILE_TOP_K, include_headline: bool = True) -> str:
+    """
+    Headline + the k bullets that best match the JD, grouped under their
+    section/role headers. Without a JD (or without any match) the full
+    BACKGROUND is returned.
+    """
+    if not job_description.strip() or k <= 0:
+        return BACKGROUND
+
+    index = get_profile_index()
+    picked = index.top_k(job_description, k)
+    if not picked:
+        return BACKGROUND
+
+    lines = ["[HEADLINE]", index.headline] if include_headline else []
+    last_header = None
+    for i in picked:
+        header = (index.sections[i], index.roles[i])
+        if header != last_header:
+            if header[0] != (last_header or ("", ""))[0]:
+                lines.append(f"\n[{index.sections[i]}]" if lines else f"[{index.sections[i]}]")
+            if index.roles[i]:
+                lines.append(index.roles[i])
+            last_header = header
+        lines.append(f"- {index.bullets[i]}")
+    return "\n".join(lines)
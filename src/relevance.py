@@ -0,0 +1,147 @@
+# src/relevance.py
+
+"""
+Local, offline relevance scoring used to keep prompts small.
+
+- tokenize / split_sentences: cheap text normalization
+- bm25_scores: vectorized BM25 of many short documents against one query
+- compact_job_description: keep only the JD sentences that best match the
+  candidate background, within a token budget, in their original order
+"""
+
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "450"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can do for from has have i in into is it its
+    of on or our so that the their them they this to we will with you your us who
+    what when where which while about across all also any more most other such than
+    then there these those through up very was were would should could may must
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9\"“(])")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split on line breaks (bullets, headings) and on sentence punctuation."""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        sentences.extend(s.strip() for s in _SENTENCE_RE.split(line) if s.strip())
+    return sentences
+
+
+def bm25_doc_matrix(docs_tokens: list[list[str]]) -> tuple[dict[str, int], np.ndarray]:
+    """
+    Build the BM25-weighted (docs x vocab) matrix for a corpus.
+    Each cell is idf * saturated term frequency, so scoring a query is one mat-vec.
+    """
+    vocab: dict[str, int] = {}
+    rows, cols = [], []
+    for i, tokens in enumerate(docs_tokens):
+        for tok in tokens:
+            rows.append(i)
+            cols.append(vocab.setdefault(tok, len(vocab)))
+
+    n_docs = len(docs_tokens)
+    tf = np.zeros((n_docs, len(vocab)), dtype=np.float32)
+    if not vocab:
+        return vocab, tf
+    np.add.at(tf, (np.asarray(rows), np.asarray(cols)), 1.0)
+
+    doc_len = tf.sum(axis=1)
+    avg_len = max(float(doc_len.mean()), 1.0)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / avg_len)
+    return vocab, tf * (BM25_K1 + 1.0) / (tf + norm[:, None]) * idf
+
+
+def query_vector(query_tokens, vocab: dict[str, int]) -> np.ndarray:
+    query = np.zeros(len(vocab), dtype=np.float32)
+    for tok in query_tokens:
+        idx = vocab.get(tok)
+        if idx is not None:
+            query[idx] += 1.0
+    # Saturate repeated query terms so a word repeated 20 times doesn't dominate.
+    return np.log1p(query)
+
+
+def bm25_scores(query_tokens: list[str], docs_tokens: list[list[str]]) -> np.ndarray:
+    """Score every document against the query in one shot."""
+    vocab, matrix = bm25_doc_matrix(docs_tokens)
+    if not vocab:
+        return np.zeros(len(docs_tokens))
+    return matrix @ query_vector(query_tokens, vocab)
+
+
+@lru_cache(maxsize=8)
+def _query_tokens(text: str) -> tuple[str, ...]:
+    return tuple(tokenize(text))
+
+
+def compact_job_description(
+    job_description: str,
+    background: str,
+    token_budget: int = JD_TOKEN_BUDGET,
+) -> str:
+    """
+    Keep the JD sentences most relevant to the background, up to token_budget.
+    Selected sentences are returned in their original order. A budget <= 0, or a
+    JD that already fits, returns the JD unchanged. If no sentence fits on its
+    own (e.g. a JD with no sentence breaks), the top-ranked one is truncated.
+    """
+    if token_budget <= 0 or estimate_tokens(job_description) <= token_budget:
+        return job_description
+
+    # Boilerplate is often repeated (e.g. scraped twice from nested blocks); keep first copies.
+    sentences = list(dict.fromkeys(split_sentences(job_description)))
+    scores = bm25_scores(list(_query_tokens(background)), [tokenize(s) for s in sentences])
+
+    chosen = []
+    used = 0
+    for idx in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(sentences[idx]) + 1
+        if used + cost > token_budget:
+            continue
+        chosen.append(idx)
+        used += cost
+
+    if not chosen:
+        top = sentences[int(np.argmax(scores))] if sentences else job_description
+        return _truncate_to_tokens(top, token_budget)
+    return "\n".join(sentences[i] for i in sorted(chosen))
+
+
+def _truncate_to_tokens(text: str, token_budget: int) -> str:
+    """Cut text to about token_budget tokens, at a word boundary when there is one."""
+    limit = token_budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut).rstrip()
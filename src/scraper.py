@@ -1,10 +1,18 @@
 # src/scraper.py
 
+import codecs
+import json
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer, Tag
+
+from .ats_adapters import route_ats_url
+from .http_scheduler import get_scheduler
+from .jd_cache import get_jd_cache
 
 
 DEFAULT_HEADERS = {
@@ -15,6 +23,34 @@ DEFAULT_HEADERS = {
     )
 }
 
+try:
+    from bs4.builder import LXMLTreeBuilder
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    LXMLTreeBuilder = None
+    HTML_PARSER = "html.parser"
+
+BLOCK_TAGS = {"section", "div", "article"}
+JOB_BLOCK_KEYWORDS = ["job", "description", "posting", "position", "content", "main"]
+
+# Subtrees that never hold description text.
+SKIP_TAGS = {"script", "style", "nav", "noscript", "template"}
+
+# String types get_text() counts by default (comments, script bodies etc. are excluded).
+TEXT_TYPES = (NavigableString, CData)
+
+BODY_STRAINER = SoupStrainer("body")
+
+# Streaming download limits: never hold more than MAX_PAGE_BYTES of a page,
+# and stop early once the page has shown this many times max_chars of text.
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+# Board payloads (Ashby) carry every job's HTML and plain description at once.
+MAX_BOARD_BYTES = 32 * 1024 * 1024
+ENOUGH_TEXT_FACTOR = 4
+CHUNK_SIZE = 64 * 1024
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
 
 def _clean_text(text: str) -> str:
     # Normalize whitespace, remove super-long runs of blank lines
@@ -24,63 +60,408 @@ def _clean_text(text: str) -> str:
     return text.strip()
 
 
+def _keyword_score(tag: Tag) -> int:
+    """Number of JOB_BLOCK_KEYWORDS mentioned in the tag's id/class."""
+    attrs = " ".join(
+        [
+            tag.get("id", ""),
+            " ".join(tag.get("class", [])),
+        ]
+    ).lower()
+    return sum(1 for k in JOB_BLOCK_KEYWORDS if k in attrs)
+
+
+def _iter_block_strings(tag: Tag):
+    """Yield the stripped, non-empty visible strings under tag, skipping SKIP_TAGS subtrees."""
+    stack = [iter(tag.contents)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        elif isinstance(child, Tag):
+            if child.name not in SKIP_TAGS:
+                stack.append(iter(child.contents))
+        elif type(child) in TEXT_TYPES:
+            text = child.strip()
+            if text:
+                yield text
+
+
 def _extract_job_block(soup: BeautifulSoup) -> Optional[str]:
     """
     Try to find the main job description block.
     We look for div/section/article whose id/class mention 'job' or 'description'
     and pick the longest reasonable one.
+
+    Runs in a single bottom-up pass: every node's text length is the sum of its
+    children's, so nested containers never rebuild their text. Length matches
+    get_text(separator="\n", strip=True): total stripped chars + (pieces - 1).
+    Ties go to the earliest block in document order, like max() over a find_all().
     """
-    candidates = []
-
-    for tag in soup.find_all(["section", "div", "article"]):
-        attrs = " ".join(
-            [
-                tag.get("id", ""),
-                " ".join(tag.get("class", [])),
-            ]
-        ).lower()
-
-        if any(k in attrs for k in ["job", "description", "posting", "position", "content", "main"]):
-            text = tag.get_text(separator="\n", strip=True)
-            if len(text) > 400:  # ignore tiny blocks
-                candidates.append(text)
-
-    if candidates:
-        # pick the longest candidate
-        best = max(candidates, key=len)
-        return best
+    best_tag = None
+    best_len = 400  # ignore tiny blocks
+    best_order = 0
+    order = 0
+
+    # Frame: [tag, children iterator, chars, pieces, preorder index]
+    stack = [[soup, iter(soup.contents), 0, 0, 0]]
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], None)
+
+        if child is None:
+            stack.pop()
+            tag, _, chars, pieces, idx = frame
+            if stack:
+                stack[-1][2] += chars
+                stack[-1][3] += pieces
+            if pieces and tag.name in BLOCK_TAGS and _keyword_score(tag) > 0:
+                length = chars + pieces - 1
+                if length > best_len or (best_tag is not None and length == best_len and idx < best_order):
+                    best_tag, best_len, best_order = tag, length, idx
+        elif isinstance(child, Tag):
+            if child.name not in SKIP_TAGS:
+                order += 1
+                stack.append([child, iter(child.contents), 0, 0, order])
+        elif type(child) in TEXT_TYPES:
+            text = child.strip()
+            if text:
+                frame[2] += len(text)
+                frame[3] += 1
+
+    if best_tag is not None:
+        return "\n".join(_iter_block_strings(best_tag))
 
     # Fallback: just use the whole body
     if soup.body:
-        return soup.body.get_text(separator="\n", strip=True)
+        return "\n".join(_iter_block_strings(soup.body)) or None
 
     return None
 
 
-def fetch_job_description(url: str, max_chars: int = 8000) -> str:
+def _make_soup(html: str) -> BeautifulSoup:
     """
-    Fetch the job description text from a URL.
+    Parse with lxml when installed (much faster). A SoupStrainer keeps only <body>,
+    so the <head> scripts/styles are never built into the tree; script/style/nav
+    inside the body are skipped by the extractor's walk. Fragments without a
+    <body> (html.parser) are re-parsed whole.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=BODY_STRAINER)
+    if soup.body is None:
+        soup = BeautifulSoup(html, HTML_PARSER)
+    return soup
 
-    This is a best-effort scraper:
-    - Makes a GET request with a real-ish User-Agent
-    - Parses HTML with BeautifulSoup
-    - Tries to extract the main job content
-    - Cleans and truncates to max_chars for model usage
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) > max_chars:
+        return text[:max_chars] + "\n\n[truncated]"
+    return text
+
+
+if LXMLTreeBuilder is not None:
+
+    class _CountingTreeBuilder(LXMLTreeBuilder):
+        """bs4's lxml tree builder, also counting visible text characters as they are parsed."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.chars = 0
+            self._skip = 0
+
+        def start(self, tag, *args, **kwargs):
+            if tag in SKIP_TAGS:
+                self._skip += 1
+            return super().start(tag, *args, **kwargs)
+
+        def end(self, tag):
+            if tag in SKIP_TAGS and self._skip:
+                self._skip -= 1
+            return super().end(tag)
+
+        def data(self, data):
+            if not self._skip:
+                self.chars += len(data.strip())
+            return super().data(data)
+
+
+class _IncrementalSoup:
+    """
+    Builds the page's soup while it downloads: each decoded chunk goes straight
+    into lxml's feed parser, whose events build the tree through bs4's own lxml
+    builder. The page is parsed once, and the visible text seen so far is known
+    after every chunk. Without lxml, chunks are buffered and parsed at close().
+    """
+
+    def __init__(self):
+        self.chunks: list[str] = []
+        self._builder = None
+        if LXMLTreeBuilder is not None:
+            self._builder = _CountingTreeBuilder()
+            # The same setup BeautifulSoup() does before its one-shot parse.
+            self._soup = BeautifulSoup("", builder=self._builder, parse_only=BODY_STRAINER)
+            self._soup.reset()
+            self._builder.initialize_soup(self._soup)
+            self._parser = self._builder.parser_for(None)
+
+    @property
+    def chars(self) -> int:
+        """Visible text characters parsed so far (0 without lxml)."""
+        return self._builder.chars if self._builder is not None else 0
+
+    def feed(self, text: str) -> None:
+        self.chunks.append(text)
+        if self._builder is not None and text:
+            self._parser.feed(text)
+
+    def close(self) -> BeautifulSoup:
+        if self._builder is None:
+            return _make_soup("".join(self.chunks))
+        try:
+            self._parser.close()
+        except Exception:
+            pass  # lxml refuses empty documents; keep whatever was built
+        # What BeautifulSoup does after a one-shot parse: close the open string and tags.
+        soup = self._soup
+        soup.endData()
+        while soup.currentTag is not None and soup.currentTag.name != soup.ROOT_TAG_NAME:
+            soup.popTag()
+        self._builder.soup = None
+        return soup
+
+
+def _read_html_bounded(
+    resp: requests.Response, max_chars: int, max_bytes: int = MAX_PAGE_BYTES
+) -> tuple[str, BeautifulSoup]:
+    """
+    Stream an HTML response into the parser without buffering the whole page
+    first. Returns (html as received, parsed soup):
+    - rejects non-HTML content types (PDFs, images, JSON blobs)
+    - stops at max_bytes
+    - stops once ENOUGH_TEXT_FACTOR * max_chars of visible text has been parsed
     """
+    content_type = resp.headers.get("Content-Type", "").lower()
+    if content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+        raise ValueError(f"unsupported content type {content_type!r}")
+
+    # requests defaults text/* without a charset to ISO-8859-1; pages without one are
+    # overwhelmingly UTF-8 in practice.
+    encoding = resp.encoding if "charset=" in content_type else "utf-8"
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    page = _IncrementalSoup()
+    enough_chars = ENOUGH_TEXT_FACTOR * max_chars
+    received = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[: max_bytes - received]
+            received += len(chunk)
+            page.feed(decoder.decode(chunk))
+            if received >= max_bytes or page.chars >= enough_chars:
+                break
+    finally:
+        resp.close()
+
+    page.feed(decoder.decode(b"", final=True))
+    return "".join(page.chunks), page.close()
+
+
+def _read_api(resp: requests.Response) -> tuple[str, str]:
+    body = _read_bounded(resp).decode("utf-8", errors="replace")
+    return body, body
+
+
+def _read_bounded(resp: requests.Response, max_bytes: int = MAX_PAGE_BYTES) -> bytes:
+    """Whole response body (API payloads), refusing anything over max_bytes."""
+    chunks = []
+    received = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_bytes:
+                raise ValueError(f"payload larger than {max_bytes} bytes")
+            chunks.append(chunk)
+    finally:
+        resp.close()
+    return b"".join(chunks)
+
+
+# Board-level ATS payloads (Ashby lists every job of an org in one response):
+# fetched once per board per run and shared by all of its postings. A permanent
+# failure (4xx, oversized or invalid payload) is remembered too, so one bad
+# board isn't requested once per posting; timeouts, 429/5xx and connection
+# errors are not, and the next posting tries again.
+_boards: Dict[str, object] = {}
+_board_locks: Dict[str, threading.Lock] = {}
+_boards_lock = threading.Lock()
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else 0
+        return status == 429 or status >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+def _fetch_board(api_url: str) -> dict:
+    with _boards_lock:
+        lock = _board_locks.setdefault(api_url, threading.Lock())
+    with lock:  # concurrent postings of one org wait for a single download
+        board = _boards.get(api_url)
+        if board is None:
+            try:
+                resp = get_scheduler().get(api_url, headers=DEFAULT_HEADERS, timeout=15, stream=True)
+                if not resp.ok:
+                    resp.close()
+                resp.raise_for_status()
+                board = json.loads(_read_bounded(resp, max_bytes=MAX_BOARD_BYTES))
+            except Exception as e:
+                if _is_transient(e):
+                    raise
+                board = e
+            _boards[api_url] = board
+    if isinstance(board, Exception):
+        raise board
+    return board
+
+
+def _fetch_board_posting(route) -> tuple[str, str]:
+    """(cleaned text, posting JSON) for a board route; ("", "") if the posting isn't on the board."""
     try:
-        resp = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
-        resp.raise_for_status()
+        posting = route.select(_fetch_board(route.api_url))
     except Exception as e:
-        print(f"[SCRAPER] Error fetching URL {url}: {e}")
-        return ""
+        print(f"[SCRAPER] Error fetching URL {route.api_url}: {e}")
+        return "", ""
+    if posting is None:
+        return "", ""
+    return _clean_text(route.parse(posting)), json.dumps(posting, ensure_ascii=False)
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+def _soup_to_text(soup: BeautifulSoup, url: str) -> str:
     raw_text = _extract_job_block(soup)
     if not raw_text:
         print(f"[SCRAPER] Could not extract main job block for {url}, using raw page text.")
-        raw_text = soup.get_text(separator="\n", strip=True)
+        raw_text = "\n".join(_iter_block_strings(soup))
+    # Break the tree's parent/child reference cycles now instead of waiting for the GC,
+    # so memory stays flat across a large batch.
+    soup.decompose()
+    return _clean_text(raw_text)
+
+
+def fetch_job_description(url: str, max_chars: int = 8000, use_cache: bool = True) -> str:
+    """
+    Fetch the job description text from a URL.
+
+    This is a best-effort scraper:
+    - Serves fresh entries from the on-disk JD cache (no network, no parsing)
+    - Revalidates stale entries with an ETag / Last-Modified conditional GET
+    - For Greenhouse / Lever / Ashby URLs, reads the public JSON posting API
+      (an Ashby board is downloaded once per org and shared by its postings)
+    - Otherwise (or if the API fails) makes a GET request with a real-ish User-Agent
+    - Streams the page with a byte cap into BeautifulSoup (lxml's feed parser,
+      so the tree is built as it downloads), stopping once enough text has arrived
+    - Tries to extract the main job content
+    - Cleans and truncates to max_chars for model usage
+    """
+    cache = get_jd_cache() if use_cache else None
+    entry = cache.get(url) if cache else None
+    if entry and cache.is_fresh(entry):
+        return _truncate(entry.text, max_chars)
+
+    headers = dict(DEFAULT_HEADERS)
+    if entry:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    # (label, fetch URL, response -> (raw body, parsed), parsed -> cleaned text), tried in order
+    sources = []
+    route = route_ats_url(url)
+    if route and route.select is not None:
+        cleaned, posting = _fetch_board_posting(route)
+        if cleaned:
+            if cache:
+                # Store just this posting, not a copy of the whole board per URL.
+                cache.put(url, raw=posting, text=cleaned)
+            return _truncate(cleaned, max_chars)
+        print(f"[SCRAPER] Empty {route.name} API posting for {url}, falling back to HTML.")
+    elif route:
+        sources.append(
+            (
+                route.name,
+                route.api_url,
+                _read_api,
+                lambda body: _clean_text(route.to_text(body)),
+            )
+        )
+    sources.append(("html", url, lambda resp: _read_html_bounded(resp, max_chars), lambda soup: _soup_to_text(soup, url)))
+
+    for label, fetch_url, read, to_text in sources:
+        try:
+            resp = get_scheduler().get(fetch_url, headers=headers, timeout=15, stream=True)
+            if resp.status_code == 304 and entry:
+                resp.close()
+                cache.mark_revalidated(
+                    url,
+                    etag=resp.headers.get("ETag", ""),
+                    last_modified=resp.headers.get("Last-Modified", ""),
+                )
+                return _truncate(entry.text, max_chars)
+            if not resp.ok:
+                resp.close()
+            resp.raise_for_status()
+            body, parsed = read(resp)
+            cleaned = to_text(parsed)
+        except Exception as e:
+            print(f"[SCRAPER] Error fetching URL {fetch_url}: {e}")
+            continue
+
+        if not cleaned and label != "html":
+            print(f"[SCRAPER] Empty {label} API posting for {url}, falling back to HTML.")
+            continue
+
+        if cache and cleaned:
+            cache.put(
+                url,
+                raw=body,
+                text=cleaned,
+                etag=resp.headers.get("ETag", ""),
+                last_modified=resp.headers.get("Last-Modified", ""),
+            )
+        return _truncate(cleaned, max_chars)
+
+    if entry:
+        print(f"[SCRAPER] Using stale cached job description for {url}")
+        return _truncate(entry.text, max_chars)
+    return ""
+
+
+def fetch_job_descriptions(
+    urls: Iterable[str],
+    max_chars: int = 8000,
+    max_concurrency: int = 8,
+    use_cache: bool = True,
+) -> Dict[str, str]:
+    """
+    Fetch many job descriptions concurrently.
+
+    - Duplicate URLs are fetched only once
+    - Requests run on a thread pool sharing the scheduler's keep-alive session,
+      so per-host rate and connection limits still apply
+    - Returns {url: cleaned_text}; failed fetches map to ""
+    """
+    unique_urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+    if not unique_urls:
+        return {}
 
-    cleaned = _clean_text(raw_text)
-    if len(cleaned) > max_chars:
-        cleaned = cleaned[:max_chars] + "\n\n[truncated]"
-    return cleaned
+    workers = max(1, min(max_concurrency, len(unique_urls)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = pool.map(
+            lambda u: fetch_job_description(u, max_chars=max_chars, use_cache=use_cache),
+            unique_urls,
+        )
+        return dict(zip(unique_urls, texts))
@@ -1,23 +1,15 @@
 import os
 import glob
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
 
-load_dotenv()
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise RuntimeError("OPENROUTER_API_KEY is not set in .env")
-
-client = OpenAI(
-    api_key=OPENROUTER_API_KEY,
-    base_url="https://openrouter.ai/api/v1",
-)
+from .llm_client import get_client
+from .llm_metrics import get_llm_metrics, report_llm_metrics
+from .llm_resilience import call_with_fallback
 
 BASE_DIR = os.path.dirname(__file__)
 SAMPLES_DIR = os.path.join(BASE_DIR, "style_samples")
 PROFILE_PATH = os.path.join(BASE_DIR, "style_profile.json")
+STYLE_MODEL = "mistralai/mistral-7b-instruct"
 
 
 def load_samples(max_chars_per_sample: int = 1500):
@@ -60,28 +52,38 @@ Return STRICTLY a JSON object with these keys:
 Make it concise but specific. Do NOT wrap in markdown. Only output JSON.
     """
 
-    completion = client.chat.completions.create(
-        model="mistralai/mistral-7b-instruct",
-        messages=[
-            {"role": "system", "content": "You are a precise writing style analyst. Output valid JSON only."},
-            {"role": "user", "content": prompt},
-        ],
-        response_format={"type": "json_object"},
-    )
-
-    content = completion.choices[0].message.content
-    profile = json.loads(content)
+    messages = [
+        {"role": "system", "content": "You are a precise writing style analyst. Output valid JSON only."},
+        {"role": "user", "content": prompt},
+    ]
+    client = get_client()
+
+    def analyze(model: str, timeout: float) -> dict:
+        with get_llm_metrics().track("style_profile", model, "style profile", messages, cache="off") as record:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                timeout=timeout,
+            )
+            record.set_usage(completion.usage)
+            record.output = completion.choices[0].message.content or ""
+        # Invalid or empty JSON raises ValueError, which moves on to the next model.
+        return json.loads(record.output)
+
+    profile, _ = call_with_fallback(analyze, STYLE_MODEL, label="style profile")
 
     with open(PROFILE_PATH, "w", encoding="utf-8") as f:
         json.dump(profile, f, indent=2, ensure_ascii=False)
 
     print(f"✅ Style profile saved to {PROFILE_PATH}")
+    report_llm_metrics()
 
 
 def load_style_profile():
     if not os.path.exists(PROFILE_PATH):
         raise RuntimeError(
-            f"Style profile not found at {PROFILE_PATH}. Run this file to generate it first."
+            f"Style profile not found at {PROFILE_PATH}. Run `python -m src.style_profile` to generate it first."
         )
     with open(PROFILE_PATH, "r", encoding="utf-8") as f:
         return json.load(f)